@@ -1,6 +1,7 @@
 # Home.py  -- the new entry point
 import streamlit as st
 from utilities.animations import add_half_screen_stock_glow
+from utilities.warmup import start_warmup_scheduler
 
 st.set_page_config(
     page_title="Live-Stocks-Tracker",
@@ -8,6 +9,7 @@ st.set_page_config(
     layout="wide",
 )
 add_half_screen_stock_glow() 
+start_warmup_scheduler()  # prefetch all universes in the background (once per process)
 
 
 # -----------------------------------------------------------------------------
@@ -1,13 +1,21 @@
 # american.py  
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 import pandas as pd
 import streamlit as st
 import requests
 from io import StringIO
+from utilities.telemetry import inc, span
 
 # ----------------------------------------------------------------------
 # Utilities
 # ----------------------------------------------------------------------
-@st.cache_data(ttl=86400) # save the loaded data for 24 hours
 # def _scrape_table(url: str, symbol_col: str = "Symbol") -> list[str]:
 #     """
 #     Read the first HTML table on *url* and return the column *symbol_col*
@@ -22,52 +30,284 @@ from io import StringIO
 
 
 
-def _scrape_table(url: str, symbol_col: str = "Symbol") -> list[str]:
-    UA = (
+UA = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
     "AppleWebKit/537.36 (KHTML, like Gecko) "
     "Chrome/120.0.0.0 Safari/537.36"
 )
-    
+
+# dated constituent snapshots, one folder per Wikipedia page
+SNAPSHOT_DIR = Path(
+    os.environ.get("LST_CONSTITUENTS_DIR", Path(__file__).resolve().parent / ".cache" / "constituents")
+)
+SNAPSHOT_MAX_AGE = 86400  # seconds before a snapshot is revalidated (in the background)
+
+logger = logging.getLogger(__name__)
+_refreshing: set = set()
+_refresh_lock = threading.Lock()
+
+
+def _snapshot_dir(url: str) -> Path:
+    return SNAPSHOT_DIR / re.sub(r"[^A-Za-z0-9]+", "_", url.rsplit("/", 1)[-1]).strip("_")
+
+
+def _read_meta(folder: Path) -> dict:
+    try:
+        return json.loads((folder / "meta.json").read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _latest_snapshot(url: str):
+    """Return (table, meta) of the newest snapshot for *url*, or (None, {})."""
+    folder = _snapshot_dir(url)
+    snapshots = sorted(folder.glob("*.csv"))
+    if not snapshots:
+        return None, {}
+    return pd.read_csv(snapshots[-1]), _read_meta(folder)
+
+
+def _extract_table_html(html: str) -> str:
+    """
+    Cut the constituents table out of the page so only that table is parsed
+    (the rest of the article is never handed to the HTML parser).
+    """
+    m = re.search(r'<table[^>]*id="constituents"[^>]*>', html) or re.search(
+        r'<table[^>]*class="[^"]*wikitable[^"]*"[^>]*>', html
+    )
+    if m is None:
+        raise ValueError("No constituents table found")
+    end = html.find("</table>", m.start())
+    return html[m.start() : end + len("</table>")]
+
+
+def _parse_wikitable(text: str) -> pd.DataFrame:
+    dfs = pd.read_html(StringIO(_extract_table_html(text)))
+    if not dfs:
+        raise ValueError("No HTML tables found")
+    return dfs[0]
+
+
+def _parse_ishares_holdings(text: str) -> pd.DataFrame:
+    """
+    Equity rows of an iShares fund holdings CSV (a few lines of fund info,
+    then the Ticker/Name/Sector/... table, then a disclaimer).
+    """
+    start = text.find("Ticker,")
+    if start < 0:
+        raise ValueError("No holdings table found")
+    df = pd.read_csv(StringIO(text[start:]), on_bad_lines="skip", dtype=str)
+    df = df[df["Asset Class"] == "Equity"].rename(columns={"Ticker": "Symbol"})
+    return df[["Symbol", "Name", "Sector"]].reset_index(drop=True)
+
+
+# warrants, units, rights, preferreds and notes are listed too; keep common stock / ADRs
+_NON_COMMON = r"\b(?:warrants?|units?|rights?|preferred|notes due|debentures?)\b"
+
+
+def _parse_symbol_directory(text: str) -> pd.DataFrame:
+    """
+    Listed, non-test, non-ETF common stocks of a Nasdaq Trader symbol
+    directory file (nasdaqlisted.txt / otherlisted.txt, pipe separated).
+    """
+    df = pd.read_csv(StringIO(text), sep="|", dtype=str)
+    df = df[~df.iloc[:, 0].str.startswith("File Creation Time", na=True)]
+    symbol_col = "Symbol" if "Symbol" in df else "ACT Symbol"
+    df = df[(df["Test Issue"] == "N") & (df["ETF"] == "N")]
+    df = df[~df["Security Name"].str.contains(_NON_COMMON, case=False, regex=True, na=False)]
+    df = df[df[symbol_col].str.fullmatch(r"[A-Z]+(\.[A-Z])?", na=False)]
+    return pd.DataFrame({"Symbol": df[symbol_col], "Name": df["Security Name"]}).reset_index(drop=True)
+
+
+@span("constituents.refresh")
+def _refresh_snapshot(url: str):
+    """
+    Revalidate the snapshot of *url* with a conditional request
+    (ETag / Last-Modified). Returns the current table.
+    """
+    folder = _snapshot_dir(url)
+    meta = _read_meta(folder)
     headers = {
         "User-Agent": UA,
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
         "Accept-Language": "en-US,en;q=0.9",
-        "Cache-Control": "no-cache",
-        "Pragma": "no-cache",
     }
+    if any(folder.glob("*.csv")):  # only revalidate what we actually have
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
     r = requests.get(url, headers=headers, timeout=20)
-    r.raise_for_status()
-    dfs = pd.read_html(StringIO(r.text))
-    if not dfs:
-        raise ValueError(f"No HTML tables found at {url}")
-    df = dfs[0]
+    inc("lst_constituent_revalidations_total", result=r.status_code)
+    if r.status_code == 304:  # unchanged since the last snapshot
+        df, _ = _latest_snapshot(url)
+    else:
+        r.raise_for_status()
+        df = _PARSERS.get(url, _parse_wikitable)(r.text)
+        folder.mkdir(parents=True, exist_ok=True)
+        df.to_csv(folder / f"{time.strftime('%Y-%m-%d')}.csv", index=False)
+        meta = {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+
+    meta["checked"] = time.time()
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / "meta.json").write_text(json.dumps(meta))
+    return df
 
-    tickers = (
-        df[symbol_col]
+
+def _refresh_in_background(url: str):
+    def _run():
+        try:
+            _refresh_snapshot(url)
+        except Exception:
+            logger.warning("could not refresh constituents from %s, keeping the last snapshot", url, exc_info=True)
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(url)
+
+    with _refresh_lock:
+        if url in _refreshing:
+            return
+        _refreshing.add(url)
+    threading.Thread(target=_run, daemon=True).start()
+
+
+@span("constituents")
+def _load_constituents(url: str) -> pd.DataFrame:
+    """
+    Constituents table of *url*. The last snapshot is returned right away;
+    if it is older than SNAPSHOT_MAX_AGE it is revalidated in the background.
+    Only a cold start (no snapshot yet) waits for Wikipedia.
+    """
+    df, meta = _latest_snapshot(url)
+    if df is None:
+        return _refresh_snapshot(url)
+    if time.time() - meta.get("checked", 0) > SNAPSHOT_MAX_AGE:
+        _refresh_in_background(url)
+    return df
+
+
+@st.cache_data(ttl=86400) # save the loaded data for 24 hours
+def _scrape_table(url: str, symbol_col: str = "Symbol") -> list[str]:
+    df = _load_constituents(url)
+    return _normalize_symbols(df[symbol_col]).tolist()
+
+
+def _normalize_symbols(symbols: pd.Series) -> pd.Series:
+    # Yahoo uses hyphen instead of period for class-A/B shares (e.g. BRK-B)
+    return (
+        symbols
         .astype(str)
         .str.strip()
         .str.upper()
         .str.replace(r"\.(\w)$", r"-\1", regex=True)
     )
-    return tickers.tolist()
+
+
+# constituent-table columns we keep (the pages differ slightly between revisions)
+_META_COLUMNS = {
+    "Security": "Name",
+    "Company": "Name",
+    "Security Name": "Name",
+    "GICS Sector": "Sector",
+    "GICS Sub-Industry": "SubIndustry",
+    "GICS Sub Industry": "SubIndustry",
+}
+
+
+@st.cache_data(ttl=86400)
+def _scrape_metadata(url: str, symbol_col: str = "Symbol") -> pd.DataFrame:
+    """
+    Symbol-indexed Name / Sector / SubIndustry table from the same
+    constituents snapshot the tickers come from (no extra request).
+    """
+    df = _load_constituents(url)
+    meta = df.rename(columns=_META_COLUMNS)
+    meta = meta.loc[:, ~meta.columns.duplicated()]
+    meta = meta.reindex(columns=["Name", "Sector", "SubIndustry"])
+    meta.index = pd.Index(_normalize_symbols(df[symbol_col]), name="Symbol")
+    return meta[~meta.index.duplicated()]
 
 
 # ──Public loaders ────────────────────────────────────────────────────────────────
+SP500_URL = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
+SP400_URL = "https://en.wikipedia.org/wiki/List_of_S%26P_400_companies"
+SP600_URL = "https://en.wikipedia.org/wiki/List_of_S%26P_600_companies"
+# Russell indexes have no public constituent list; the iShares ETFs tracking them publish full holdings daily
+RUSSELL1000_URL = "https://www.ishares.com/us/products/239707/ishares-russell-1000-etf/1467271812596.ajax?fileType=csv&fileName=IWB_holdings&dataType=fund"
+RUSSELL2000_URL = "https://www.ishares.com/us/products/239710/ishares-russell-2000-etf/1467271812596.ajax?fileType=csv&fileName=IWM_holdings&dataType=fund"
+# every Nasdaq- and NYSE/other-listed security
+NASDAQ_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt"
+OTHER_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt"
+
+# sources that are not Wikipedia tables
+_PARSERS = {
+    RUSSELL1000_URL: _parse_ishares_holdings,
+    RUSSELL2000_URL: _parse_ishares_holdings,
+    NASDAQ_LISTED_URL: _parse_symbol_directory,
+    OTHER_LISTED_URL: _parse_symbol_directory,
+}
+
 @st.cache_data(ttl=86400)
 def load_sp500() -> list[str]:
     """Return the 500 S&P-500 tickers from Wikipedia."""
-    url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-    return _scrape_table(url)
+    return _scrape_table(SP500_URL)
 
 @st.cache_data(ttl=86400)
 def load_spmid400() -> list[str]:
     """Return the 400 S&P-400 (mid-cap) tickers."""
-    url = "https://en.wikipedia.org/wiki/List_of_S%26P_400_companies"
-    return _scrape_table(url)
+    return _scrape_table(SP400_URL)
 
 @st.cache_data(ttl=86400)
 def load_spsmall600() -> list[str]:
     """Return the 600 S&P-600 (small-cap) tickers."""
-    url = "https://en.wikipedia.org/wiki/List_of_S%26P_600_companies"
-    return _scrape_table(url)
+    return _scrape_table(SP600_URL)
+
+@st.cache_data(ttl=86400)
+def load_russell1000() -> list[str]:
+    """Return the ~1,000 Russell 1000 tickers (iShares IWB holdings)."""
+    return _scrape_table(RUSSELL1000_URL)
+
+@st.cache_data(ttl=86400)
+def load_russell2000() -> list[str]:
+    """Return the ~2,000 Russell 2000 tickers (iShares IWM holdings)."""
+    return _scrape_table(RUSSELL2000_URL)
+
+@st.cache_data(ttl=86400)
+def load_total_market() -> list[str]:
+    """Return every US-listed common stock / ADR (Nasdaq Trader symbol directory, ~6-7k tickers)."""
+    symbols = _scrape_table(NASDAQ_LISTED_URL) + _scrape_table(OTHER_LISTED_URL)
+    return list(dict.fromkeys(symbols))
+
+# cap-size radio label → loader, shared by the pages and the warm-up worker
+UNIVERSES = {
+    "Large (S&P 500)": load_sp500,
+    "Mid (S&P 400)": load_spmid400,
+    "Small (S&P 600)": load_spsmall600,
+    "Russell 1000": load_russell1000,
+    "Russell 2000": load_russell2000,
+    "Total US market": load_total_market,
+}
+UNIVERSE_URLS = {
+    "Large (S&P 500)": (SP500_URL,),
+    "Mid (S&P 400)": (SP400_URL,),
+    "Small (S&P 600)": (SP600_URL,),
+    "Russell 1000": (RUSSELL1000_URL,),
+    "Russell 2000": (RUSSELL2000_URL,),
+    "Total US market": (NASDAQ_LISTED_URL, OTHER_LISTED_URL),
+}
+# the S&P universes the portfolio pages offer and the warm-up keeps ready
+CORE_UNIVERSES = ("Large (S&P 500)", "Mid (S&P 400)", "Small (S&P 600)")
+
+
+def load_metadata(universe: str) -> pd.DataFrame:
+    """Return the Symbol-indexed Name / Sector / SubIndustry table of a universe label."""
+    meta = pd.concat([_scrape_metadata(url) for url in UNIVERSE_URLS[universe]])
+    return meta[~meta.index.duplicated()]
+
+
+def load_all_universes() -> dict[str, list[str]]:
+    """Load the three S&P universes in parallel (label → tickers)."""
+    with ThreadPoolExecutor(max_workers=len(CORE_UNIVERSES)) as pool:
+        futures = {label: pool.submit(UNIVERSES[label]) for label in CORE_UNIVERSES}
+        return {label: fut.result() for label, fut in futures.items()}
@@ -0,0 +1,126 @@
+# run_benchmarks.py - time and memory-profile every stage of the scan pipeline
+#
+#   python -m benchmarks.run_benchmarks                      # all sizes
+#   python -m benchmarks.run_benchmarks --sizes 50 500       # pick sizes
+#   python -m benchmarks.run_benchmarks --compare            # diff against the previous run
+#
+# Every run is written to benchmarks/results/<timestamp>.json together with
+# the Python/pandas/NumPy versions, so regressions after an upgrade show up
+# as a diff between two files.
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utilities.providers import ReplayProvider, synthetic_history
+from utilities.ticker_info import _price_days_ago, _rsi, download_ticker_data, get_ticker_stats
+from utilities.adjust_ui import render_company_blocks
+from utilities.compact import CompactHistory, deep_nbytes
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_SIZES = [50, 500, 1500, 10000]
+
+
+def _measure(fn, repeat: int = 3) -> dict:
+    """Best-of-`repeat` wall time and the peak traced allocation of one call."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": min(times), "mean_seconds": float(np.mean(times)), "peak_mb": peak / 2**20}
+
+
+def bench_size(n_symbols: int, repeat: int, max_loop: int) -> dict:
+    """Run every stage on a synthetic universe of *n_symbols*."""
+    symbols = [f"SYN{i:05d}" for i in range(n_symbols)]
+    chunk = synthetic_history(symbols, n_days=252)
+    provider = ReplayProvider(data=chunk, synthetic=False)
+    results = {}
+
+    results["download_ticker_data"] = _measure(
+        lambda: download_ticker_data(symbols, use_store=False, provider=provider), repeat=1
+    )
+
+    # shaped like the 150-symbol chunks the pages concat
+    parts = [chunk.iloc[:, i : i + 150 * 6] for i in range(0, chunk.shape[1], 150 * 6)]
+    results["concat"] = _measure(lambda: pd.concat(parts, axis=1), repeat)
+    data = pd.concat(parts, axis=1)
+    results["concat"]["resident_mb"] = deep_nbytes(data) / 2**20
+    results["compact"] = _measure(lambda: CompactHistory.from_frames(parts), repeat)
+    results["compact"]["resident_mb"] = deep_nbytes(CompactHistory.from_frames(parts)) / 2**20
+
+    results["get_ticker_stats_vectorized"] = _measure(
+        lambda: get_ticker_stats(data, symbols, 30, vectorized=True), repeat
+    )
+    if n_symbols <= max_loop:
+        results["get_ticker_stats_loop"] = _measure(lambda: get_ticker_stats(data, symbols, 30), 1)
+
+    closes = data[symbols[0]]["Close"]
+    results["_rsi_single"] = _measure(lambda: _rsi(closes), repeat)
+    results["_price_days_ago_single"] = _measure(lambda: _price_days_ago(closes, 30), repeat)
+
+    stats = pd.DataFrame(get_ticker_stats(data, symbols, 30, vectorized=True))
+    results["render_company_blocks"] = _measure(lambda: render_company_blocks(stats), 1)
+    return results
+
+
+def _environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+
+
+def _compare(current: dict, previous: dict):
+    print(f"\ncompared with {previous['timestamp']} (pandas {previous['environment']['pandas']})")
+    for size, stages in current["results"].items():
+        for stage, res in stages.items():
+            old = previous["results"].get(size, {}).get(stage)
+            if old is None:
+                continue
+            ratio = res["seconds"] / old["seconds"] if old["seconds"] else float("nan")
+            flag = "  <-- slower" if ratio > 1.2 else ""
+            print(f"{size:>6} {stage:<30} {old['seconds']:9.4f}s -> {res['seconds']:9.4f}s  x{ratio:5.2f}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scan pipeline on synthetic universes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-loop", type=int, default=1500,
+                        help="skip the per-symbol get_ticker_stats loop above this size")
+    parser.add_argument("--compare", action="store_true", help="diff against the latest stored run")
+    args = parser.parse_args(argv)
+
+    run = {"timestamp": pd.Timestamp.now().isoformat(timespec="seconds"),
+           "environment": _environment(), "results": {}}
+    for n in args.sizes:
+        run["results"][str(n)] = bench_size(n, args.repeat, args.max_loop)
+        for stage, res in run["results"][str(n)].items():
+            print(f"{n:>6} {stage:<30} {res['seconds']:9.4f}s  peak {res['peak_mb']:8.1f} MB")
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    previous = sorted(RESULTS_DIR.glob("*.json"))
+    out = RESULTS_DIR / f"{run['timestamp'].replace(':', '-')}.json"
+    out.write_text(json.dumps(run, indent=1))
+    print(f"\nsaved {out}")
+
+    if args.compare and previous:
+        _compare(run, json.loads(previous[-1].read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Live_Watch.py - intraday watch list, refreshed in place every minute
+import streamlit as st
+import pandas as pd
+from american import UNIVERSES, load_metadata
+from utilities.adjust_ui import card_html
+from utilities.intraday import get_watcher
+from utilities.warmup import start_warmup_scheduler
+from utilities.telemetry import perf_panel, track_run
+
+# ── SETTINGS ────────────────────────────────────────────────────────────────
+st.set_page_config(layout="wide", page_icon="⏱️")
+st.title("⏱️ Live Watch (intraday)")
+start_warmup_scheduler()
+track_run()
+
+# ── SIDEBAR ──────────────────────────────────────────────────────────────────
+cap_size = st.sidebar.radio("Cap Size universe", list(UNIVERSES))
+watch_size = st.sidebar.number_input("Symbols to watch", 10, 600, 600)
+show_top = st.sidebar.number_input("Cards to show (biggest movers)", 4, 100, 20)
+cadence = st.sidebar.number_input("Refresh every (seconds)", 30, 300, 60)
+typed = st.sidebar.text_input("Or watch these tickers (comma separated)")
+
+st.sidebar.info(
+    "Only minute bars newer than the last poll are fetched, and all sessions "
+    "watching the same list share one poll."
+)
+
+# ── WATCH LIST ──────────────────────────────────────────────────────────────
+if typed.strip():
+    symbols = tuple(dict.fromkeys(s.strip().upper() for s in typed.split(",") if s.strip()))
+else:
+    symbols = tuple(UNIVERSES[cap_size]()[:watch_size])
+
+watcher = get_watcher(cap_size, symbols)
+metadata = load_metadata(cap_size)
+
+# rendered card html per symbol, keyed by the watcher's version of that symbol
+if "live_cards" not in st.session_state:
+    st.session_state.live_cards = {}
+
+
+# ── LIVE GRID (only this fragment reruns on the timer) ──────────────────────
+@st.fragment(run_every=cadence)
+def live_grid():
+    with st.spinner("Polling minute bars…"):
+        changed = watcher.refresh(max_age=cadence - 1)
+
+    stats = watcher.stats()
+    if stats.empty:
+        st.info("No intraday bars yet (the market may be closed).")
+        return
+    stats = stats.join(metadata[["Name", "Sector"]].rename(columns={"Sector": "_sector"}), on="Symbol")
+    stats["Sector"] = stats["_sector"].fillna("-")
+    stats["Name"] = stats["Name"].fillna("")
+
+    top = stats.reindex(stats["Change"].abs().sort_values(ascending=False).index).head(show_top)
+
+    # every card is its own element in a container keyed by its symbol, 4
+    # per row. Only cards whose values moved since this session last drew
+    # them are formatted again; the others are re-sent with identical
+    # markup, so a poll replaces only the changed cards' elements
+    cards = st.session_state.live_cards
+    redrawn = 0
+    columns = st.columns(4)
+    for i, row in enumerate(top.itertuples(index=False)):
+        cached = cards.get(row.Symbol)
+        if cached is None or cached[0] != row.Version:
+            cached = cards[row.Symbol] = (row.Version, card_html(
+                row, ago_label="Prev close", avgvol_label=f"Avg Vol (30 × {watcher.interval} bars)"))
+            redrawn += 1
+        with columns[i % 4].container(key=f"card_{row.Symbol}"):
+            st.markdown(cached[1], unsafe_allow_html=True)
+
+    last = pd.Timestamp(watcher.last_poll, unit="s", tz="UTC").tz_convert("America/New_York")
+    st.caption(
+        f"{len(stats)} / {len(symbols)} symbols live · last poll {last:%H:%M:%S} ET "
+        f"took {watcher.last_poll_seconds:.1f}s · {len(changed)} changed · {redrawn} cards redrawn"
+    )
+
+
+live_grid()
+
+# ── PERFORMANCE (timings of this run, with LST_PERF_PANEL=1) ──────────────────
+perf_panel()
@@ -1,10 +1,17 @@
 import streamlit as st
 import pandas as pd
-from american import load_sp500, load_spmid400, load_spsmall600
+from american import CORE_UNIVERSES, load_metadata
 from utilities.ticker_info import get_ticker_stats, download_ticker_data
-from utilities.adjust_ui import render_company_blocks
+from utilities.compact import CompactHistory
+from utilities.metrics import STATS_COLUMNS
+from utilities.scan_engine import symbol_stats
+from utilities.symbol_index import get_symbol_index
+from utilities.adjust_ui import download_progress, render_company_blocks
 import utilities.auth_utils as auth
-from utilities.db_utils import insert_portfolios_row
+from utilities.db_utils import upsert_portfolio_rows
+from utilities.scan_cache import get_cached_stats
+from utilities.warmup import start_warmup_scheduler
+from utilities.telemetry import perf_panel, track_run
 
 # ─────────────────────────────────────────────────────────────
 # PAGE SETTINGS
@@ -12,6 +19,8 @@ from utilities.db_utils import insert_portfolios_row
 st.set_page_config(layout="wide", page_icon="📉📈")
 st.title("🏪 Make Your Own Portfolio")
 st.info("Create a portfolio of stocks from all three universes.")
+start_warmup_scheduler()
+track_run()
 
 # ─────────────────────────────────────────────────────────────
 # AUTHENTICATION LOGIC
@@ -46,7 +55,7 @@ if "user_email" in st.session_state:
 # ─────────────────────────────────────────────────────────────
 session_defaults = {
     "data_loaded": False,
-    "watch_list": [],
+    "watch_list": {},  # ordered set: symbol → None
     "ticker_input": "",
     "universe_tickers": [],
     "current_cap_size": "",
@@ -65,10 +74,17 @@ loading_msg = st.empty()
 
 cap_size = st.radio(
     "Cap Size universe",
-    ["Large (S&P 500)", "Mid (S&P 400)", "Small (S&P 600)"],
+    list(CORE_UNIVERSES),
     horizontal=True,
 )
 
+# off: only the tickers you type are downloaded (plus whatever is cached)
+load_universe = st.toggle(
+    "Download the whole universe up front",
+    value=False,
+    help="Only needed to browse stats of tickers you have not typed. "
+         "Otherwise tickers are fetched on demand, a second or so each batch.",
+)
 fetch_btn = st.button("Fetch Data")
 
 # ─────────────────────────────────────────────────────────────
@@ -78,21 +94,29 @@ if fetch_btn and not st.session_state.data_loaded:
     loading_msg.info("🔄 Fetching data… please wait.")
     st.session_state.data_loaded = True
 
-    if cap_size.startswith("Large"):
-        universe = load_sp500()
-    elif cap_size.startswith("Mid"):
-        universe = load_spmid400()
-    else:
-        universe = load_spsmall600()
+    # constituents + company names, indexed once per process
+    universe = get_symbol_index(cap_size).symbols
 
     st.session_state.universe_tickers = universe
     st.session_state.current_cap_size = cap_size
 
-    frames = download_ticker_data(symbols=universe)
-    all_ticker_data = pd.concat(frames, axis=1)
-    ticker_stats = get_ticker_stats(data=all_ticker_data, symbols=universe)
-    ticker_stats_df = pd.DataFrame(ticker_stats)
-    st.session_state.all_ticker_data = ticker_stats_df
+    # stats published by the warm-up worker / another session need no download
+    cached_stats = get_cached_stats(cap_size)
+    if cached_stats is not None:
+        ticker_stats_df = cached_stats.for_window(30)
+    elif not load_universe:
+        # lazy: filled with the typed tickers only (see the search below)
+        ticker_stats_df = pd.DataFrame(columns=STATS_COLUMNS)
+    else:
+        with download_progress() as progress:
+            frames = download_ticker_data(symbols=universe, progress_cb=progress)
+        all_ticker_data = CompactHistory.from_frames(frames)
+        ticker_stats = get_ticker_stats(
+            data=all_ticker_data, symbols=universe, vectorized=True, metadata=load_metadata(cap_size)
+        )
+        ticker_stats_df = pd.DataFrame(ticker_stats)
+    # keyed by symbol: lookups below are index hits, not boolean masks
+    st.session_state.all_ticker_data = ticker_stats_df.set_index("Symbol", drop=False).rename_axis(None)
     loading_msg.empty()
 
 # reset data_loaded if user changes cap size
@@ -103,48 +127,94 @@ if st.session_state.current_cap_size != cap_size:
 # ─────────────────────────────────────────────────────────────
 # SEARCH + PORTFOLIO PERSISTENCE
 # ─────────────────────────────────────────────────────────────
+def _add_ticker(symbol):
+    """Append a suggestion to the ticker box (runs before the rerun draws it)."""
+    current = st.session_state.ticker_input.strip().rstrip(",")
+    st.session_state.ticker_input = f"{current}, {symbol}" if current else symbol
+
+
 if st.session_state.data_loaded:
+    index = get_symbol_index(st.session_state.current_cap_size)
+
+    # autocomplete: ticker / company-name prefixes, typo tolerant
+    query = st.text_input(
+        "🔎 Search by ticker or company name",
+        placeholder="e.g. nvidia, bank of am, AAP",
+        key="company_query",
+    )
+    if query:
+        matches = index.search(query, limit=8)
+        if not matches:
+            st.caption("No matches.")
+        columns = st.columns(4)
+        for i, (sym, name) in enumerate(matches):
+            columns[i % 4].button(
+                f"➕ {sym} · {name}" if name else f"➕ {sym}",
+                key=f"suggest_{sym}", on_click=_add_ticker, args=(sym,), use_container_width=True,
+            )
+
     example_list = st.session_state.universe_tickers
     search_inputs = st.text_input(
         "Enter comma-separated ticker symbols",
         placeholder=f"e.g. {str(example_list[:10]).strip('[]')}",
         key="ticker_input",
     )
-    search_inputs = search_inputs.split(",")
+    # set lookups only, so pasting hundreds of tickers stays instant
+    found, unknown = index.split(search_inputs)
+    watch_list = st.session_state.watch_list
+    already = [s for s in found if s in watch_list]
+    to_add = [s for s in found if s not in watch_list]
     added_tickers = pd.DataFrame()
 
-    for search_input in search_inputs:
-        search_input = search_input.strip().upper()
-        if not search_input:
-            continue
-
-        if search_input not in st.session_state.universe_tickers:
-            st.warning(f"Ticker {search_input} not found in universe.")
-        elif search_input in st.session_state.watch_list:
-            st.info(f"Ticker {search_input} already in watch list.")
-        else:
-            st.session_state.watch_list.append(search_input)
-            test_df = st.session_state.all_ticker_data
-            filtered = test_df[test_df["Symbol"] == search_input]
-            added_tickers = pd.concat([added_tickers, filtered], ignore_index=True)
-            st.toast(f"Ticker {search_input} added to watch list.")
-
-            # persist in Supabase
-            if user is not None and search_input not in st.session_state.persisted_tickers:
-                try:
-                    if insert_portfolios_row(
-                        st.session_state.user_email,
-                        st.session_state.current_cap_size,
-                        search_input,
-                    ):
-                        st.success(f"✅ {search_input} saved to your portfolio!")
-                    else:
-                        st.info(f"ℹ️ {search_input} is already saved.")
-                    st.session_state.persisted_tickers.add(search_input)
-                except Exception as e:
-                    st.error(f"⚠️ Failed to save {search_input}: {e}")
+    if unknown:
+        st.warning(f"Not found in universe: {', '.join(unknown)}")
+    if already:
+        st.info(f"Already in watch list: {', '.join(already)}")
+    if to_add:
+        watch_list.update(dict.fromkeys(to_add))
+        shown = ", ".join(to_add[:10]) + (f" and {len(to_add) - 10} more" if len(to_add) > 10 else "")
+        st.toast(f"Added to watch list: {shown}")
+
+    # persisted in Supabase below, all new tickers in one round trip
+    to_persist = [s for s in to_add if user is not None and s not in st.session_state.persisted_tickers]
+
+    if to_add:
+        # tickers without stats yet (lazy mode): one batched download for all of them
+        known = st.session_state.all_ticker_data.index
+        missing = [s for s in to_add if s not in known]
+        if missing:
+            with st.spinner(f"Fetching {', '.join(missing)}…"):
+                fetched = symbol_stats(st.session_state.current_cap_size, missing, days=30)
+            fetched = fetched.set_index("Symbol", drop=False).rename_axis(None)
+            current = st.session_state.all_ticker_data
+            st.session_state.all_ticker_data = (
+                fetched if current.empty else pd.concat([current, fetched])
+            )
+            no_history = [s for s in missing if s not in fetched.index]
+            if no_history:
+                st.warning(f"No price history available for {', '.join(no_history)}.")
+        stats_by_symbol = st.session_state.all_ticker_data
+        added_tickers = stats_by_symbol.loc[[s for s in to_add if s in stats_by_symbol.index]]
+
+    if to_persist:
+        try:
+            new, duplicates = upsert_portfolio_rows(
+                st.session_state.user_email,
+                st.session_state.current_cap_size,
+                to_persist,
+            )
+            if new:
+                st.success(f"✅ {', '.join(new)} saved to your portfolio!")
+            if duplicates:
+                st.info(f"ℹ️ {', '.join(duplicates)} already saved.")
+            st.session_state.persisted_tickers.update(to_persist)
+        except Exception as e:
+            st.error(f"⚠️ Failed to save {', '.join(to_persist)}: {e}")
 
     if not added_tickers.empty:
         render_company_blocks(ticker_stats_df=added_tickers)
 else:
     loading_msg.info("Please click 'Fetch Data' to load data.")
+
+# ── PERFORMANCE (timings of this run, with LST_PERF_PANEL=1) ──────────────────
+perf_panel()
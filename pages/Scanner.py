@@ -1,45 +1,55 @@
 # Scanner.py - a simple stock scanner for top-20 gainers and losers
 import streamlit as st
 import pandas as pd
-import requests, io, yfinance as yf, numpy as np, random
-from american import load_sp500, load_spmid400, load_spsmall600
-from utilities.ticker_info import get_ticker_stats, download_ticker_data
-from utilities.adjust_ui import render_company_blocks
-import time
+from american import UNIVERSES
+from utilities.compact import CompactHistory, memory_report
+from utilities.scan_engine import RunningMovers, run_scan, top_movers
+from utilities.screener import ScreenError, screen_stats
+from utilities.backtest import backtest, summarize_backtest
+from utilities.price_store import PriceStore
+from utilities.metrics import sector_summary
+from utilities.indicators import INDICATOR_COLUMNS, INDICATORS
+from utilities.adjust_ui import cards_html, download_progress, render_company_blocks
+from utilities.warmup import start_warmup_scheduler
+from utilities.telemetry import perf_panel, track_run
 
 # ── SETTINGS ────────────────────────────────────────────────────────────────
 st.set_page_config(layout="wide", page_icon="📉📈")
 st.title("📉📈 Top-20 Losers & Gainers")
+start_warmup_scheduler()
+track_run()
 
 # ── SIDEBAR ──────────────────────────────────────────────────────────────────
 cap_size = st.sidebar.radio(
     "Cap Size universe",
-    [
-        "Large (S&P 500)",
-        "Mid (S&P 400)",
-        "Small (S&P 600)",
-    ],  # categories on the side bar
+    list(UNIVERSES),  # S&P 500/400/600, Russell 1000/2000, total US market
 )
 days = st.sidebar.number_input(
     "Look-back window (days)", 5, 90, 30
 )  # number of days to look back
 max_scan = st.sidebar.number_input(
-    "Max symbols to scan (set to universe size for full scan)", 10, 600, 600
-)  # default 600
+    "Max symbols to scan (set to universe size for full scan)", 10, 10000, 10000
+)  # default: whole universe
 run_btn = st.sidebar.button("🔍 Run Scan")
 
 # one-time sidebar note
-st.sidebar.info("Tip: changing any sidebar value refreshes results automatically.")
+st.sidebar.info(
+    "Tip: changing any sidebar value refreshes results automatically. "
+    "Look-back changes are instant, no new download is needed."
+)
 
 # ── PLACEHOLDER FOR LOADING MESSAGE ─────────────────────────────────────────
 loading_msg = st.empty()
 
-# tuple of current sidebar values
-params = (cap_size, days, max_scan)
+# sidebar values that need new data; the look-back window is answered
+# from the precomputed per-window table without a download
+params = (cap_size, max_scan)
 
 # initialize session-state slots
 if "prev_params" not in st.session_state:
     st.session_state.prev_params = None
+if "window_stats" not in st.session_state:
+    st.session_state.window_stats = None
 if "losers" not in st.session_state:
     st.session_state.losers = pd.DataFrame()
     st.session_state.gainers = pd.DataFrame()
@@ -50,68 +60,115 @@ needs_refresh = run_btn or (params != st.session_state.prev_params)
 # ── MAIN SCAN ───────────────────────────────────────────────────────────────
 if needs_refresh:
     loading_msg.info("🔄 Fetching data… please wait.")
-    # load universe
-    universe = (
-        load_sp500()
-        if cap_size.startswith("Large")
-        else load_spmid400()
-        if cap_size.startswith("Mid")
-        else load_spsmall600()
-    )
+    # the scan itself lives in the headless engine (also used by the CLI):
+    # shared cache → sharded scan for big universes → chunked download
+    partial_ph = st.empty()
+    running = RunningMovers(days, k=20)
+
+    def show_partial(part, done, total):
+        # every finished chunk updates the running top-20 right away
+        running.add(part)
+        losers, gainers = running.movers()
+        shown = gainers if st.session_state.get("view") == "Gainers" else losers
+        label = "Gainers" if shown is gainers else "Losers"
+        partial_ph.markdown(
+            f"**⏳ Partial result: {done} of {total} tickers scanned so far, the top-20 {label.lower()} "
+            "can still change.**\n\n" + (cards_html(shown, days=days) if not shown.empty else ""),
+            unsafe_allow_html=True,
+        )
+
+    with download_progress() as progress:
+        result = run_scan(cap_size, max_scan=max_scan, progress_cb=progress, partial_cb=show_partial)
+    partial_ph.empty()
+    window_stats = result.stats
 
     # user determines max scan size
-    if max_scan >= len(universe):  # full scan
-        symbols = universe
+    if result.full:  # full scan
         st.sidebar.success(
-            f"Scanning entire universe ({len(universe)} tickers). "
+            f"Scanning entire universe ({result.universe_size} tickers). "
             "This gives objective top-20. Will take a bit longer than a sampled scan."
         )
     else:  # sampled scan
-        symbols = random.sample(universe, max_scan)
         st.sidebar.warning(
-            f"Scanning a random sample of {max_scan} / {len(universe)} "
+            f"Scanning a random sample of {max_scan} / {result.universe_size} "
             "tickers (faster, may miss some extremes)."
         )
 
-    # ── FAST BULK DOWNLOAD (chunked) ───────────────────────────────────────────
-    frames = download_ticker_data(symbols=symbols)
-
-    # concatenate all frames into a single DataFrame
-    all_ticker_data = pd.concat(frames, axis=1)
-
-    # compute tickert stats like change, RSI and average volume
-    ticker_stats = get_ticker_stats(
-        data=all_ticker_data, symbols=symbols, days_back=days
-    )
+    st.session_state.window_stats = window_stats
+    st.session_state.prev_params = params
+    loading_msg.empty()
 
-    # convert to DataFrame
-    ticker_stats_df = pd.DataFrame(ticker_stats)
+# ── LOOK-BACK WINDOW (lookup in the precomputed table, no network) ─────────
+if st.session_state.window_stats is not None:
+    ticker_stats_df = st.session_state.window_stats.for_window(days)
 
     # if the look back returns no tickers, we need to handle that
     if ticker_stats_df.empty:
-        loading_msg.empty()
         st.warning("No tickers had enough history for that look-back window.")
         st.session_state.losers = pd.DataFrame()
         st.session_state.gainers = pd.DataFrame()
     else:
-        st.session_state.losers = ticker_stats_df[
-            ticker_stats_df["Change"] < 0
-        ].nsmallest(20, "Change")
-        st.session_state.gainers = ticker_stats_df[
-            ticker_stats_df["Change"] > 0
-        ].nlargest(20, "Change")
+        st.session_state.losers, st.session_state.gainers = top_movers(ticker_stats_df, 20)
 
-    st.session_state.prev_params = params
-    loading_msg.empty()
+# ── MEMORY REPORT ───────────────────────────────────────────────────────────
+with st.sidebar.expander("Memory (this session)"):
+    st.dataframe(memory_report(dict(st.session_state)), hide_index=True, use_container_width=True)
 
 # ── DISPLAY ─────────────────────────────────────────────────────────────────
 if not st.session_state.losers.empty:
-    view = st.selectbox("Show", ["Losers", "Gainers"])
-    data_subset = (
-        st.session_state.losers if view == "Losers" else st.session_state.gainers
-    )
+    view = st.selectbox("Show", ["Losers", "Gainers", "Screen"], key="view")
+    if view == "Screen":
+        # filter/sort/limit over the whole scan, cached per scan and expression
+        query = st.text_input(
+            "Screen", "RSI < 30 and AvgVol > 1M sort by Change asc limit 20",
+            help="Columns: " + ", ".join(ticker_stats_df.columns) + ". Combine comparisons with and / or / not, "
+                 "then optionally `sort by <column> asc|desc` and `limit <n>`.",
+        )
+        try:
+            data_subset = screen_stats(st.session_state.window_stats, days, query)
+        except ScreenError as e:
+            st.error(f"Invalid screen: {e}")
+            data_subset = ticker_stats_df.iloc[:0]
+        st.caption(f"{len(data_subset)} matching tickers")
+    else:
+        data_subset = (
+            st.session_state.losers if view == "Losers" else st.session_state.gainers
+        )
 
     st.header(f"{view} – {cap_size} – last {days} days")
     render_company_blocks(ticker_stats_df=data_subset, days=days)
+
+    # sector aggregates come from the constituent table, no extra download
+    with st.expander("Sector breakdown (whole scan)"):
+        st.dataframe(sector_summary(ticker_stats_df), use_container_width=True)
+
+    # computed with the stats (one pass over the scan), so sorting is free
+    with st.expander("Indicators (whole scan)"):
+        shown = ["Symbol", "Name", "Sector", "Change", "RSI"] + INDICATOR_COLUMNS
+        st.dataframe(
+            ticker_stats_df[[c for c in shown if c in ticker_stats_df]],
+            hide_index=True, use_container_width=True,
+            column_config={c: st.column_config.NumberColumn(INDICATORS[c].label) for c in INDICATOR_COLUMNS},
+        )
+        st.caption("Crossovers: bars since the fast average crossed the slow one (+ above, − below).")
+
+    # replays the signal on every stored date (reads the local price store)
+    with st.expander("Backtest: how did past top-20 baskets do afterwards?"):
+        horizons = st.multiselect("Holding period (trading days)", [1, 5, 10, 20], [1, 5, 20])
+        if st.button("Run backtest") and horizons:
+            scanned = st.session_state.window_stats.base["Symbol"].tolist()
+            history = CompactHistory.from_frame(PriceStore().read(scanned))
+            result = backtest(history, scanned, windows=[days], horizons=horizons)
+            if result.empty:
+                st.info("No stored history for this universe yet, run a full scan first.")
+            else:
+                st.dataframe(summarize_backtest(result), hide_index=True, use_container_width=True)
+                curve = result.pivot_table(index="Date", columns="Horizon", values=["Losers", "Gainers", "Universe"])
+                h = min(horizons)
+                st.caption(f"Mean {h}-day forward return per signal date (%)")
+                st.line_chart(curve.xs(h, axis=1, level="Horizon"))
 else:
     st.info("No data yet. Adjust sidebar and click run if needed.")
+
+# ── PERFORMANCE (timings of this run, with LST_PERF_PANEL=1) ──────────────────
+perf_panel()
@@ -2,6 +2,11 @@ import streamlit as st
 from utilities.db_utils import fetch_portfolio_from_db
 from utilities.adjust_ui import render_company_blocks
 import utilities.auth_utils as auth
+from utilities.warmup import start_warmup_scheduler
+from utilities.telemetry import perf_panel, track_run
+
+start_warmup_scheduler()
+track_run()
 
 #  ── AUTH CHECK ────────────────────────────────────────────────────────────────
 user = auth.get_user_info()
@@ -49,3 +54,6 @@ else:
     if st.button("Take me there 🥊"):
         st.switch_page("pages/Make_Your_Portfolio.py")
 
+
+# ── PERFORMANCE (timings of this run, with LST_PERF_PANEL=1) ──────────────────
+perf_panel()
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+DSN = os.environ.get("LST_TEST_POSTGRES_DSN")  # e.g. "dbname=postgres user=postgres host=localhost"
+if not DSN:
+    pytest.skip("set LST_TEST_POSTGRES_DSN to run against a local Postgres", allow_module_level=True)
+
+from utilities.db_utils import upsert_portfolio_rows
+
+
+@pytest.fixture
+def conn():
+    conn = psycopg2.connect(DSN)
+    with conn.cursor() as cur:
+        # a session-private table that shadows any real `portfolios`
+        cur.execute("""
+            CREATE TEMP TABLE portfolios (
+                email text NOT NULL, cap_size text NOT NULL, ticker text NOT NULL,
+                UNIQUE (email, ticker)
+            )
+        """)
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def _saved(conn, email):
+    with conn.cursor() as cur:
+        cur.execute("SELECT ticker FROM portfolios WHERE email = %s ORDER BY ticker", (email,))
+        return [r[0] for r in cur.fetchall()]
+
+
+def test_new_and_duplicates(conn):
+    assert upsert_portfolio_rows("a@x.io", "Large", ["AAPL", "MSFT"], conn=conn) == (["AAPL", "MSFT"], [])
+    new, duplicates = upsert_portfolio_rows("a@x.io", "Large", ["NVDA", "AAPL", "NVDA", "AMZN"], conn=conn)
+    assert (new, duplicates) == (["NVDA", "AMZN"], ["AAPL"])
+    assert _saved(conn, "a@x.io") == ["AAPL", "AMZN", "MSFT", "NVDA"]
+
+
+def test_users_are_separate(conn):
+    upsert_portfolio_rows("a@x.io", "Large", ["AAPL"], conn=conn)
+    assert upsert_portfolio_rows("b@x.io", "Large", ["AAPL"], conn=conn) == (["AAPL"], [])
+    assert _saved(conn, "b@x.io") == ["AAPL"]
+
+
+def test_empty_list_touches_nothing(conn):
+    assert upsert_portfolio_rows("a@x.io", "Large", [], conn=conn) == ([], [])
+    assert _saved(conn, "a@x.io") == []
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from utilities.indicator_state import IndicatorState
+from utilities.providers import synthetic_history
+from utilities.ticker_info import _rsi
+
+
+@pytest.fixture(scope="module")
+def bars():
+    return synthetic_history(["AAA"], n_days=120, end="2024-06-28")["AAA"]
+
+
+def test_incremental_matches_full_recompute(bars):
+    state = IndicatorState()
+    state.update(bars["Close"].iloc[:60], bars["Volume"].iloc[:60])
+    for i in range(60, len(bars)):  # one new bar per refresh
+        state.update(bars["Close"].iloc[i:i + 1], bars["Volume"].iloc[i:i + 1])
+        seen = bars.iloc[:i + 1]
+        assert state.rsi() == pytest.approx(_rsi(seen["Close"]).iloc[-1], rel=1e-9)
+        assert state.avg_volume() == pytest.approx(seen["Volume"].tail(30).mean(), rel=1e-12)
+    assert state.n_bars == len(bars)
+
+
+def test_partial_last_bar_is_replaced(bars):
+    state = IndicatorState()
+    state.update(bars["Close"], bars["Volume"])
+    final = bars["Close"].iloc[-1]
+    snapshot = bars["Close"].iloc[-1:] * 1.05  # the same bar, seen earlier in the day
+    state.update(snapshot)
+    assert state.last_close == pytest.approx(final * 1.05)
+    state.update(bars["Close"].iloc[-1:], bars["Volume"].iloc[-1:])
+    assert state.last_close == pytest.approx(final)
+    assert state.rsi() == pytest.approx(_rsi(bars["Close"]).iloc[-1], rel=1e-9)
+    assert state.n_bars == len(bars)
+
+
+def test_older_bars_are_ignored(bars):
+    state = IndicatorState()
+    state.update(bars["Close"], bars["Volume"])
+    rsi = state.rsi()
+    state.update(bars["Close"].iloc[:10] * 2)
+    assert state.rsi() == rsi and not np.isnan(rsi)
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utilities.metrics import compute_window_stats
+from utilities.providers import synthetic_history
+from utilities.ticker_info import get_ticker_stats
+
+COLUMNS = ["Symbol", "Change", "Today", "Ago", "RSI", "AvgVol"]
+
+
+@pytest.fixture(scope="module")
+def history():
+    symbols = [f"S{i:03d}" for i in range(60)]
+    data = synthetic_history(symbols, n_days=200, end="2024-06-28")
+    # missing bars scattered over some symbols, and one symbol with a short history
+    rng = np.random.default_rng(1)
+    for sym in symbols[:20]:
+        data.loc[data.index[rng.choice(200, 15, replace=False)], (sym, "Close")] = np.nan
+    data.loc[data.index[:-22], ("S059", "Close")] = np.nan
+    return data, symbols
+
+
+@pytest.mark.parametrize("days", [5, 30, 90])
+def test_vectorized_matches_loop(history, days):
+    data, symbols = history
+    loop = pd.DataFrame(get_ticker_stats(data, symbols, days))
+    fast = pd.DataFrame(get_ticker_stats(data, symbols, days, vectorized=True))
+    assert len(loop) > 0
+    pd.testing.assert_frame_equal(fast[COLUMNS], loop[COLUMNS], rtol=1e-5)
+
+
+def test_short_history_left_out(history):
+    data, symbols = history
+    stats = pd.DataFrame(get_ticker_stats(data, symbols, 30, vectorized=True))
+    assert "S059" not in set(stats["Symbol"])  # 22 bars < 30 + 15
+    assert "S059" in set(pd.DataFrame(get_ticker_stats(data, symbols, 5, vectorized=True))["Symbol"])
+
+
+def test_window_stats_match_single_window(history):
+    data, symbols = history
+    stats = compute_window_stats(data, symbols, [5, 30, 90])
+    for days in (5, 30, 90):
+        single = compute_window_stats(data, symbols, [days]).for_window(days)
+        pd.testing.assert_frame_equal(stats.for_window(days), single)
+
+
+def test_select_versions(history):
+    data, symbols = history
+    stats = compute_window_stats(data, symbols, [5, 30])
+    assert stats.select(symbols) is stats  # the whole universe: same stats, same version
+    sample = stats.select(symbols[10:20])
+    assert sample.version == stats.select(symbols[10:20]).version != stats.version
+    assert stats.select(symbols[20:30]).version != sample.version
+    assert list(sample.base["Symbol"]) == symbols[10:20]
@@ -0,0 +1,64 @@
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from utilities.price_store import MARKET_TZ, PriceStore
+from utilities.providers import synthetic_history
+
+SYMBOLS = [f"S{i:02d}" for i in range(40)]
+
+
+def _local(hour, minute):
+    """An ET wall-clock time on Friday 2024-06-28 as the naive local time the manifest uses."""
+    et = datetime(2024, 6, 28, hour, minute, tzinfo=MARKET_TZ)
+    return pd.Timestamp(et.astimezone().replace(tzinfo=None))
+
+
+def test_concurrent_writers(tmp_path):
+    # separate stores on one directory, like two sessions and the warm-up thread
+    data = synthetic_history(SYMBOLS, n_days=300, end="2024-06-28")
+    errors = []
+
+    def write():
+        try:
+            for _ in range(3):
+                PriceStore(tmp_path).write(data, SYMBOLS)
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    store = PriceStore(tmp_path)
+    assert all(store.coverage(s) is not None for s in SYMBOLS)
+    assert not list((tmp_path / "1d").glob("*.tmp"))
+
+
+def test_restated_history_is_dropped(tmp_path):
+    data = synthetic_history(["AAA", "BBB"], n_days=300, end="2024-06-28")
+    store = PriceStore(tmp_path)
+    store.write(data, ["AAA", "BBB"])
+
+    tail = data.iloc[-5:].copy()
+    tail[("AAA", "Close")] /= 2  # a 2:1 split re-adjusts the overlapping bars
+    written = store.write(tail, ["AAA", "BBB"])
+    assert list(written) == ["BBB"]
+    assert store.coverage("AAA") is None
+    assert store.coverage("BBB") is not None
+
+
+def test_plan_refetches_snapshots_after_the_close(tmp_path):
+    data = synthetic_history(["AAA"], n_days=300, end="2024-06-28")
+    store = PriceStore(tmp_path)
+
+    store.write(data, ["AAA"], now=_local(15, 30))  # intraday snapshot of the 28th
+    assert store.plan(["AAA"], now=_local(15, 50)) == {}  # within refresh_after, same session
+    assert list(store.plan(["AAA"], now=_local(16, 5)).values()) == [["AAA"]]  # the close came since
+
+    store.write(data, ["AAA"], now=_local(16, 10))
+    assert store.plan(["AAA"], now=_local(16, 40)) == {}
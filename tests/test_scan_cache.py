@@ -0,0 +1,44 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from utilities import scan_cache
+from utilities.price_store import MARKET_TZ
+
+SESSION = pd.Timestamp("2024-06-28")  # a Friday
+
+
+def _publish(tmp_path, monkeypatch, published_at):
+    monkeypatch.setattr(scan_cache, "STATS_DIR", tmp_path)
+    pd.to_pickle({"session_date": SESSION, "stats": "stats", "published": published_at.timestamp()},
+                 scan_cache._stats_path("Large"))
+
+
+def _read_at(monkeypatch, now):
+    monkeypatch.setattr(scan_cache.time, "time", lambda: now.timestamp())
+    return scan_cache._read_published("Large", SESSION, ttl=3600)
+
+
+def test_next_open_skips_the_weekend():
+    assert scan_cache.next_open(SESSION) == datetime(2024, 7, 1, 9, 30, tzinfo=MARKET_TZ)
+
+
+def test_final_stats_outlive_the_ttl(tmp_path, monkeypatch):
+    # the 16:30 warm-up: still served at 08:00 Monday, long after the TTL
+    _publish(tmp_path, monkeypatch, datetime(2024, 6, 28, 16, 30, tzinfo=MARKET_TZ))
+    assert _read_at(monkeypatch, datetime(2024, 7, 1, 8, 0, tzinfo=MARKET_TZ)) == ("stats", 0.0)
+
+
+def test_intraday_stats_expire(tmp_path, monkeypatch):
+    # a scan run during Monday's session holds its moving intraday bar
+    _publish(tmp_path, monkeypatch, datetime(2024, 7, 1, 11, 0, tzinfo=MARKET_TZ))
+    stats, age = _read_at(monkeypatch, datetime(2024, 7, 1, 11, 30, tzinfo=MARKET_TZ))
+    assert (stats, age) == ("stats", pytest.approx(1800))
+    assert _read_at(monkeypatch, datetime(2024, 7, 1, 12, 30, tzinfo=MARKET_TZ)) is None
+
+
+def test_other_session_is_ignored(tmp_path, monkeypatch):
+    _publish(tmp_path, monkeypatch, datetime(2024, 6, 28, 16, 30, tzinfo=MARKET_TZ))
+    assert scan_cache._read_published("Large", pd.Timestamp("2024-07-01"), ttl=3600) is None
+    assert scan_cache._read_published("Small", SESSION, ttl=3600) is None
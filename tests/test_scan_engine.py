@@ -0,0 +1,23 @@
+import pandas as pd
+import pytest
+
+from utilities.metrics import compute_window_stats
+from utilities.providers import synthetic_history
+from utilities.scan_engine import RunningMovers, top_movers
+
+
+@pytest.mark.parametrize("k", [1, 5, 20])
+def test_running_movers_match_full_table(k):
+    symbols = [f"S{i:03d}" for i in range(240)]
+    data = synthetic_history(symbols, n_days=120, end="2024-06-28")
+    days = 30
+
+    running = RunningMovers(days, k)
+    for i in range(0, len(symbols), 50):  # uneven chunks, like the download batches
+        running.add(compute_window_stats(data, symbols[i:i + 50], [days]))
+    losers, gainers = running.movers()
+
+    full_losers, full_gainers = top_movers(compute_window_stats(data, symbols, [days]).for_window(days), k)
+    assert running.symbols == len(symbols)
+    pd.testing.assert_frame_equal(losers, full_losers, check_dtype=False)
+    pd.testing.assert_frame_equal(gainers, full_gainers, check_dtype=False)
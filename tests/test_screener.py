@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utilities.screener import ScreenError, parse_screen, run_screen
+
+
+@pytest.fixture
+def table():
+    rng = np.random.default_rng(0)
+    n = 500
+    change = rng.normal(0, 5, n)
+    change[::37] = np.nan
+    return pd.DataFrame({
+        "Symbol": [f"S{i:03d}" for i in range(n)],
+        "Sector": rng.choice(["Energy", "Utilities", "Financials"], n),
+        "Change": change,
+        "RSI": rng.uniform(0, 100, n),
+        "AvgVol": rng.uniform(1e4, 5e6, n),
+    })
+
+
+def test_parse_parts():
+    screen = parse_screen("RSI < 30 and AvgVol > 1M sort by Change desc limit 20")
+    assert (screen.sort, screen.ascending, screen.limit) == ("Change", False, 20)
+    assert parse_screen("limit 5").where is None
+
+
+def test_filter(table):
+    out = run_screen(table, 'RSI < 30 and AvgVol > 1.5m and Sector in ("Energy", "Utilities")')
+    expected = table[(table.RSI < 30) & (table.AvgVol > 1.5e6) & table.Sector.isin(["Energy", "Utilities"])]
+    pd.testing.assert_frame_equal(out, expected.reset_index(drop=True))
+
+
+def test_boolean_structure(table):
+    # NaN compares False, so `not` keeps the rows without a Change
+    out = run_screen(table, "not (Change > -2 or rsi >= 50)")
+    expected = table[~((table.Change > -2) | (table.RSI >= 50))]
+    pd.testing.assert_frame_equal(out, expected.reset_index(drop=True))
+
+
+@pytest.mark.parametrize("k", [1, 10, 100, 1000])
+def test_top_k_matches_nsmallest(table, k):
+    out = run_screen(table, f"Change < 0 sort by Change asc limit {k}")
+    expected = table[table.Change < 0].nsmallest(k, "Change")
+    pd.testing.assert_frame_equal(out, expected.reset_index(drop=True))
+
+    out = run_screen(table, f"sort by Change desc limit {k}")  # rows without a Change are left out
+    expected = table.dropna(subset=["Change"]).nlargest(k, "Change")
+    pd.testing.assert_frame_equal(out, expected.reset_index(drop=True))
+
+
+@pytest.mark.parametrize("text", [
+    "RSI <",                 # missing operand
+    "RSI < 30 and",          # dangling keyword
+    "(RSI < 30",             # unbalanced parenthesis
+    "RSI ~ 30",              # unknown character
+    "RSI in 30",             # `in` needs a list
+    "RSI < 30 limit -1",     # negative limit
+    "RSI < 30 sort Change",  # missing `by`
+    "RSI < 30 30",           # trailing token
+])
+def test_syntax_errors(text):
+    with pytest.raises(ScreenError):
+        parse_screen(text)
+
+
+def test_unknown_column(table):
+    with pytest.raises(ScreenError, match="Unknown column 'Beta'"):
+        run_screen(table, "Beta > 1")
+
+
+def test_sort_by_text_column(table):
+    with pytest.raises(ScreenError, match="numeric column"):
+        run_screen(table, "sort by Sector")
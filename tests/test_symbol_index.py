@@ -0,0 +1,40 @@
+import pytest
+
+from utilities.symbol_index import SymbolIndex
+
+
+@pytest.fixture(scope="module")
+def index():
+    names = {
+        "AAPL": "Apple Inc.", "AAL": "American Airlines Group", "AMZN": "Amazon.com Inc.",
+        "BAC": "Bank of America Corp", "BK": "Bank of New York Mellon", "BRK-B": "Berkshire Hathaway",
+        "NVDA": "NVIDIA Corporation", "MSFT": "Microsoft Corp",
+    }
+    return SymbolIndex(list(names) + ["AAPL"], names)
+
+
+def test_exact_ticker_first(index):
+    assert [s for s, _ in index.search("AA")][:2] == ["AAL", "AAPL"]
+    assert index.search("aapl")[0] == ("AAPL", "Apple Inc.")
+    assert index.search("brk.b")[0][0] == "BRK-B"
+
+
+def test_name_words(index):
+    assert index.search("bank of am")[0] == ("BAC", "Bank of America Corp")
+    assert {s for s, _ in index.search("bank")} == {"BAC", "BK"}
+    assert index.search("corp") == []  # legal-form words match nothing on their own
+
+
+def test_fuzzy(index):
+    assert index.search("nvidai")[0][0] == "NVDA"
+    assert index.search("microsfot")[0][0] == "MSFT"
+
+
+def test_limit_and_empty(index):
+    assert len(index.search("a", limit=2)) == 2
+    assert index.search("  ") == []
+
+
+def test_split(index):
+    assert index.split("aapl, msft brk.b,XYZ aapl") == (["AAPL", "MSFT", "BRK-B"], ["XYZ"])
+    assert len(index) == 8 and "NVDA" in index
@@ -0,0 +1,42 @@
+import contextvars
+import threading
+
+from utilities import telemetry
+from utilities.telemetry import REGISTRY, span
+
+
+def _timed(name):
+    with span(name):
+        pass
+
+
+def _page_run(name, runs):
+    telemetry.track_run()
+    _timed(name)
+    # worker threads see the run through a copied context, like the chunk downloads
+    worker = threading.Thread(target=contextvars.copy_context().run, args=(_timed, f"{name}.chunk"))
+    worker.start()
+    worker.join()
+    runs.append(telemetry._run_id.get())
+
+
+def test_spans_are_tagged_with_their_run(monkeypatch):
+    monkeypatch.setattr(telemetry, "PERF_PANEL", True)
+    runs = []
+    for name in ("first", "second"):  # two sessions, each in its own script thread
+        t = threading.Thread(target=_page_run, args=(name, runs))
+        t.start()
+        t.join()
+    _timed("untracked")  # e.g. the warm-up thread
+
+    assert REGISTRY.run_spans(runs[0])["span"].tolist() == ["first", "first.chunk"]
+    assert REGISTRY.run_spans(runs[1])["span"].tolist() == ["second", "second.chunk"]
+
+
+def test_no_run_without_the_panel(monkeypatch):
+    monkeypatch.setattr(telemetry, "PERF_PANEL", False)
+    runs = []
+    t = threading.Thread(target=_page_run, args=("off", runs))
+    t.start()
+    t.join()
+    assert runs == [None]
@@ -1,52 +1,161 @@
+import html
+import math
+import time
+from contextlib import contextmanager
+
 import streamlit as st
 import requests
 import numpy as np
+import pandas as pd
 from bs4 import BeautifulSoup
+from utilities.indicators import INDICATORS
+from utilities.telemetry import span
 
 
 
-def render_company_blocks(ticker_stats_df, days=30):
+@contextmanager
+def download_progress(label="⏳ downloading price history…"):
+    """
+    Progress bar + timer for `download_ticker_data(progress_cb=...)` and the
+    scan engine. Yields the callback; the widgets are removed on exit.
+    The callback takes (done, total, report) where report is a
+    `ChunkReport` or a short text.
     """
-    Render a Streamlit block for each row in the given DataFrame.
+    bar_ph = st.progress(0, label)  # bar placeholder
+    text_ph = st.empty()  # timer placeholder
+    start_ts = time.time()
+
+    def _progress(done, total, report=None):
+        elapsed = time.time() - start_ts
+        bar_ph.progress(done / total)
+        if hasattr(report, "seconds"):
+            report = f"last chunk: {report.symbols} symbols in {report.seconds:0.1f}s"
+        text_ph.text(f"{label} {elapsed:0.1f}s" + (f" ({report})" if report else ""))
+
+    try:
+        yield _progress
+    finally:
+        bar_ph.empty()
+        text_ph.empty()
+
+
+# one card per line: blank lines or indentation would end the html block
+# once several cards share a single markdown element
+_CARD_TEMPLATE = (
+    '<div style="position:relative;border:6px solid #004080;border-radius:6px;padding:3px 9px;margin-bottom:9px;">'
+    '<h3 style="margin:0">{symbol} <span style="font-size:16px;color:#aaaaaa;">{name}</span></h3>'
+    '<span style="font-size:25px;color:#aaaaaa;">{sector}</span><br>'
+    '<span style="font-size:25px;color:{color};">{arrow} {change}%</span><br>'
+    '<span style="font-size:25px;color:green;">Now €{today}</span><br>'
+    '<span style="font-size:25px;color:red;">{ago_label} €{ago}</span><br>'
+    '<span style="font-size:20px;">RSI-14: {rsi}</span><br>'
+    '<span style="font-size:20px;">{avgvol_label}: {avgvol}</span>'
+    "{indicators}"
+    "</div>"
+)
+# registered indicators shown on the cards (raw MACD is left out, it is in
+# price units and not comparable between symbols)
+CARD_INDICATORS = ["SMACross", "EMACross", "MACDHist", "BBWidth", "ATR", "RealizedVol"]
+_GRID_STYLE = "display:grid;grid-template-columns:repeat(4,minmax(0,1fr));column-gap:1rem;"
+PAGE_SIZE = 100
+
+
+def _fmt(values: pd.Series, spec: str) -> pd.Series:
+    return values.map(lambda v: "nan" if v is None or math.isnan(v) else format(v, spec))
+
+
+def _indicator_line(df: pd.DataFrame):
+    """Small grey "label: value · ..." line of the card indicators present in *df* ("" if none)."""
+    present = [INDICATORS[c] for c in CARD_INDICATORS if c in df]
+    if not present:
+        return ""
+    line = None
+    for ind in present:
+        part = f"{ind.label}: " + _fmt(df[ind.name].astype(float), ind.fmt)
+        line = part if line is None else line + " · " + part
+    return '<br><span style="font-size:16px;color:#aaaaaa;">' + line + "</span>"
+
+
+def _card_fields(ticker_stats_df: pd.DataFrame, days: int = 30, ago_label=None,
+                 avgvol_label=None) -> pd.DataFrame:
+    """Every text piece of the cards, formatted column by column."""
+    df = ticker_stats_df
+    change = df["Change"].astype(float)
+    names = df["Name"] if "Name" in df else pd.Series("", index=df.index)
+    return pd.DataFrame({
+        "symbol": df["Symbol"].astype(str).map(html.escape),
+        "name": names.fillna("").astype(str).map(html.escape),
+        "sector": df["Sector"].where(df["Sector"] != "-", "").fillna("").astype(str).map(html.escape),
+        "color": np.where(change < 0, "red", "green"),
+        "arrow": np.where(change < 0, "↓", "↑"),
+        "change": _fmt(change, "+.2f"),
+        "today": _fmt(df["Today"].astype(float), ".2f"),
+        "ago_label": ago_label or f"{days} d ago",
+        "ago": _fmt(df["Ago"].astype(float), ".2f"),
+        "rsi": _fmt(df["RSI"].astype(float), ".1f"),
+        "avgvol_label": avgvol_label or "Avg Vol (30 d)",
+        "avgvol": _fmt(df["AvgVol"].astype(float), ",.0f"),
+        "indicators": _indicator_line(df),
+    }, index=df.index)
+
 
-    Every block is a bordered div with a header (stock symbol) and 4 rows of text:
+def grid_html(cards) -> str:
+    """Wrap already rendered cards in the 4-per-row grid."""
+    return f'<div style="{_GRID_STYLE}">{"".join(cards)}</div>'
+
+
+def cards_html(ticker_stats_df: pd.DataFrame, days: int = 30, ago_label=None) -> str:
+    """The whole card grid (4 per row) as one html string."""
+    fields = _card_fields(ticker_stats_df, days=days, ago_label=ago_label)
+    return grid_html(_CARD_TEMPLATE.format(**r) for r in fields.to_dict("records"))
+
+
+def card_html(row, days=30, ago_label=None, avgvol_label=None):
+    """
+    HTML of one company block: a bordered div with a header (stock symbol and
+    company name) and rows for sector, change, current price, the reference
+    price, RSI-14, average volume and, when the row has them, the
+    indicators of `CARD_INDICATORS`. *ago_label* replaces the default
+    "<days> d ago" caption of the reference price, *avgvol_label* the
+    "Avg Vol (30 d)" one (e.g. for intraday bars).
+    """
+    row = pd.DataFrame([row._asdict() if hasattr(row, "_asdict") else dict(row)])
+    fields = _card_fields(row, days=days, ago_label=ago_label, avgvol_label=avgvol_label)
+    return _CARD_TEMPLATE.format(**fields.iloc[0].to_dict())
+
+
+@span("render")
+def render_company_blocks(ticker_stats_df, days=30, page_size=PAGE_SIZE, key="company_blocks"):
+    """
+    Render a block for each row in the given DataFrame.
+
+    Every block is a bordered div with a header (stock symbol and company
+    name) and rows of text:
     - sector (if available)
     - change (with arrow and color)
     - current price
-    - price 30 days ago
+    - price `days` days ago
     - RSI-14
     - average 30-day volume
+    - crossovers, MACD histogram, Bollinger width, ATR and realized
+      volatility (if the stats have them)
 
-    The blocks are arranged in columns of 4, wrapping to the next line if there are more than 4 entries.
+    The blocks are laid out 4 per row. All blocks of a page go to the browser
+    as a single markdown element instead of one element per ticker; above
+    *page_size* blocks a page selector appears. *key* keeps the container
+    (and the page selector) stable across reruns.
     """
-    cols = st.columns(4)
-
-    for idx, row in ticker_stats_df.reset_index(drop=True).iterrows():
-        with cols[idx % 4]:
-            
-
-            st.markdown(
-                f"""
-<div style="
-    position:relative;
-    border:6px solid #004080;
-    border-radius:6px;
-    padding:3px 9px;
-    margin-bottom:9px;">
-
-
-
-
-<h3 style="margin:0">{row.Symbol}</h3>
-<span style="font-size:25px;color:#aaaaaa;">{row.Sector if row.Sector != "-" else ""}</span><br>
-<span style="font-size:25px;color:{"red" if row.Change < 0 else "green"};">
-{"↓" if row.Change < 0 else "↑"} {row.Change:+.2f}%
-</span><br>
-<span style="font-size:25px;color:green;">Now €{row.Today:.2f}</span><br>
-<span style="font-size:25px;color:red;">{days} d ago €{row.Ago:.2f}</span><br>
-<span style="font-size:20px;">RSI-14: {row.RSI:.1f}</span><br>
-<span style="font-size:20px;">Avg Vol (30 d): {row.AvgVol:,.0f}</span>
-</div>
-""",
-                unsafe_allow_html=True,
-            )
+    n = len(ticker_stats_df)
+    if n == 0:
+        return
+
+    page = 1
+    n_pages = -(-n // page_size)
+    if n_pages > 1:
+        page = st.number_input(
+            f"Page (of {n_pages}, {page_size} per page)", 1, n_pages, 1, key=f"{key}_page"
+        )
+    rows = ticker_stats_df.iloc[(page - 1) * page_size: page * page_size]
+
+    with st.container(key=key):
+        st.markdown(cards_html(rows, days=days), unsafe_allow_html=True)
@@ -0,0 +1,137 @@
+from typing import Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from utilities.metrics import field_matrix
+from utilities.telemetry import span
+
+# ----------------------------------------------------------------------
+# Historical replay of the Scanner signal: on every stored date, take the
+# top-k losers and gainers over a look-back of N calendar days (the same
+# definition the Scanner uses) and measure their forward returns over H
+# bars. Everything is computed on the dates × symbols close matrix at
+# once: one look-back matrix per N, one forward-return matrix per H and
+# an `argpartition` per row to pick the baskets.
+# ----------------------------------------------------------------------
+MIN_EXTRA_BARS = 15  # same history-length check as `get_ticker_stats`
+
+
+def lookback_changes(closes: pd.DataFrame, days_back: int) -> np.ndarray:
+    """
+    % change of every symbol on every date versus its close `days_back`
+    calendar days earlier (or the last bar before that). NaN where the
+    symbol has no bar that day or not enough history yet.
+    """
+    values = closes.to_numpy(dtype=float)
+    ffilled = closes.ffill().to_numpy(dtype=float)
+    dates = closes.index.normalize().values
+
+    targets = dates - np.timedelta64(days_back, "D")
+    rows = np.searchsorted(closes.index.values, targets, side="right") - 1
+    then = np.where(rows[:, None] >= 0, ffilled[np.maximum(rows, 0)], np.nan)
+
+    n_seen = np.cumsum(~np.isnan(values), axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = (values / then - 1) * 100
+    return np.where(n_seen >= days_back + MIN_EXTRA_BARS, change, np.nan)
+
+
+def forward_returns(closes: pd.DataFrame, horizon: int) -> np.ndarray:
+    """% return from each date's close to the close `horizon` bars later (NaN past the end)."""
+    ffilled = closes.ffill().to_numpy(dtype=float)
+    out = np.full_like(ffilled, np.nan)
+    if horizon < len(ffilled):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[:-horizon] = (ffilled[horizon:] / ffilled[:-horizon] - 1) * 100
+    return out
+
+
+def pick_baskets(change: np.ndarray, k: int = 20):
+    """
+    Column positions of the k most negative (losers) and k most positive
+    (gainers) changes per row, as (dates, k) arrays padded with -1 where a
+    row has fewer than k losers / gainers (the Scanner's `Change < 0` /
+    `Change > 0` filters).
+    """
+    k = min(k, change.shape[1])
+    baskets = []
+    for sign in (1, -1):  # losers: smallest first; gainers: largest first
+        key = np.where(np.isnan(change), np.inf, sign * change)
+        idx = np.argpartition(key, k - 1, axis=1)[:, :k]
+        ok = np.take_along_axis(sign * change, idx, axis=1) < 0
+        baskets.append(np.where(ok, idx, -1))
+    return baskets[0], baskets[1]
+
+
+def _row_nanmean(values: np.ndarray) -> np.ndarray:
+    count = (~np.isnan(values)).sum(axis=1)
+    return np.where(count > 0, np.nansum(values, axis=1) / np.maximum(count, 1), np.nan)
+
+
+def _basket_mean(fwd: np.ndarray, idx: np.ndarray) -> np.ndarray:
+    """Equal-weight mean of *fwd* over each row's basket (-1 entries skipped)."""
+    vals = np.take_along_axis(fwd, np.maximum(idx, 0), axis=1)
+    return _row_nanmean(np.where(idx >= 0, vals, np.nan))
+
+
+def backtest(data, symbols: List[str], windows: Iterable[int] = (5, 10, 30),
+             horizons: Iterable[int] = (1, 5, 20), k: int = 20) -> pd.DataFrame:
+    """
+    Forward returns of the Scanner's top-k losers/gainers baskets.
+
+    Args:
+        data: ticker-grouped frame or `CompactHistory` (e.g. the price store).
+        symbols (List[str]): universe to rank.
+        windows (Iterable[int]): look-backs N (calendar days, as in the Scanner).
+        horizons (Iterable[int]): holding periods H (bars).
+        k (int): basket size.
+
+    Returns:
+        pd.DataFrame: one row per (Date, Window, Horizon) with the equal-weight
+        mean forward % return of the Losers and Gainers baskets and of the
+        whole Universe, and the basket sizes.
+    """
+    closes = field_matrix(data, symbols, "Close")
+    columns = ["Date", "Window", "Horizon", "Losers", "Gainers", "Universe", "NLosers", "NGainers"]
+    if closes.empty:
+        return pd.DataFrame(columns=columns)
+
+    with span("backtest", symbols=closes.shape[1], dates=closes.shape[0]):
+        fwd = {h: forward_returns(closes, h) for h in horizons}
+        has_bar = ~np.isnan(closes.to_numpy(dtype=float))
+        universe = {h: _row_nanmean(np.where(has_bar, f, np.nan)) for h, f in fwd.items()}
+        frames = []
+        for n in windows:
+            losers, gainers = pick_baskets(lookback_changes(closes, n), k)
+            for h, f in fwd.items():
+                frames.append(pd.DataFrame({
+                    "Date": closes.index, "Window": n, "Horizon": h,
+                    "Losers": _basket_mean(f, losers), "Gainers": _basket_mean(f, gainers),
+                    "Universe": universe[h],
+                    "NLosers": (losers >= 0).sum(axis=1), "NGainers": (gainers >= 0).sum(axis=1),
+                }))
+    result = pd.concat(frames, ignore_index=True)
+    return result.dropna(subset=["Universe"]).reset_index(drop=True)[columns]
+
+
+def summarize_backtest(result: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per (Window, Horizon): number of signal dates, mean forward return of
+    each basket, mean excess over the universe and the share of dates the
+    basket beat the universe.
+    """
+    df = result.assign(
+        LosersExcess=result["Losers"] - result["Universe"],
+        GainersExcess=result["Gainers"] - result["Universe"],
+    )
+    return df.groupby(["Window", "Horizon"]).agg(
+        Dates=("Date", "size"),
+        Losers=("Losers", "mean"),
+        Gainers=("Gainers", "mean"),
+        Universe=("Universe", "mean"),
+        LosersExcess=("LosersExcess", "mean"),
+        GainersExcess=("GainersExcess", "mean"),
+        LosersHitRate=("LosersExcess", lambda s: (s.dropna() > 0).mean()),
+        GainersHitRate=("GainersExcess", lambda s: (s.dropna() > 0).mean()),
+    ).reset_index()
@@ -0,0 +1,205 @@
+import sys
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utilities.telemetry import span
+# ----------------------------------------------------------------------
+# Compact in-memory price history. The stats and indicators only read
+# Close, High, Low and Volume, so instead of the ticker-grouped float64
+# frame with all six yfinance fields we keep contiguous dates × symbols
+# arrays: float32 prices and int64 volumes, plus a symbol → column index.
+# That is well under half the memory, which is what a long-lived, shared
+# cache (or a session holding a full scan) pays for.
+# ----------------------------------------------------------------------
+COMPACT_FIELDS = ("Close", "High", "Low", "Volume")
+PRICE_FIELDS = ("Close", "High", "Low")
+MISSING_VOLUME = -1  # int volumes cannot hold NaN; marks "no bar"
+
+
+@dataclass
+class CompactHistory:
+    """
+    Close, High, Low and Volume of many symbols on a shared date index.
+
+    Attributes:
+        dates (pd.DatetimeIndex): sorted, unique bar dates (rows).
+        symbols (pd.Index): symbols (columns), unique.
+        close (np.ndarray): float32 closes, NaN where a symbol has no bar.
+        volume (np.ndarray): int64 volumes, `MISSING_VOLUME` where it has none.
+        high, low (np.ndarray): float32 highs / lows, NaN where unknown.
+    """
+    dates: pd.DatetimeIndex
+    symbols: pd.Index
+    close: np.ndarray
+    volume: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+
+    # ── construction ──────────────────────────────────────────────────────
+    @classmethod
+    def empty(cls) -> "CompactHistory":
+        prices = np.empty((0, 0), np.float32)
+        return cls(pd.DatetimeIndex([]), pd.Index([]), prices, np.empty((0, 0), np.int64), prices, prices)
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame, symbols: Optional[List[str]] = None) -> "CompactHistory":
+        """Build from a ticker-grouped frame, columns (symbol, field)."""
+        if data.empty or not isinstance(data.columns, pd.MultiIndex):
+            return cls.empty()
+        data = data.loc[:, ~data.columns.duplicated()]
+        closes = data.xs("Close", axis=1, level=1)
+        if symbols is not None:
+            closes = closes[[s for s in dict.fromkeys(symbols) if s in closes.columns]]
+        closes = closes.sort_index()
+        fields = set(data.columns.get_level_values(1))
+
+        def _field(name, dtype):
+            if name not in fields:
+                return np.full(closes.shape, np.nan, dtype=dtype)
+            frame = data.xs(name, axis=1, level=1).reindex(index=closes.index, columns=closes.columns)
+            return np.ascontiguousarray(frame.to_numpy(dtype=dtype))
+
+        vol_vals = _field("Volume", float)
+        volume = np.where(np.isnan(vol_vals), MISSING_VOLUME, np.nan_to_num(vol_vals)).astype(np.int64)
+        return cls(pd.DatetimeIndex(closes.index), pd.Index(closes.columns),
+                   np.ascontiguousarray(closes.to_numpy(dtype=np.float32)), volume,
+                   _field("High", np.float32), _field("Low", np.float32))
+
+    @classmethod
+    def from_frames(cls, frames: Iterable[pd.DataFrame], symbols: Optional[List[str]] = None) -> "CompactHistory":
+        """
+        Build from downloaded chunks without concatenating the full frames
+        first: each chunk is reduced to the compact fields, then those are aligned.
+        """
+        frames = [f for f in frames if not f.empty]
+        with span("concat", chunks=len(frames)):
+            return cls.concat([cls.from_frame(f) for f in frames], symbols)
+
+    @classmethod
+    def concat(cls, parts: Iterable["CompactHistory"], symbols: Optional[List[str]] = None) -> "CompactHistory":
+        """Align several histories on the union of their dates (first copy of a symbol wins)."""
+        parts = [p for p in parts if len(p.symbols)]
+        if not parts:
+            return cls.empty()
+        dates = parts[0].dates.append([p.dates for p in parts[1:]]).unique().sort_values()
+        order = []
+        for p in parts:
+            order.extend(p.symbols)
+        order = list(dict.fromkeys(order))
+        if symbols is not None:
+            order = [s for s in dict.fromkeys(symbols) if s in set(order)]
+
+        column = {s: i for i, s in enumerate(order)}
+        shape = (len(dates), len(order))
+        close, high, low = (np.full(shape, np.nan, dtype=np.float32) for _ in PRICE_FIELDS)
+        volume = np.full(shape, MISSING_VOLUME, dtype=np.int64)
+        filled = np.zeros(len(order), dtype=bool)
+        for p in parts:
+            rows = dates.get_indexer(p.dates)
+            for j, sym in enumerate(p.symbols):
+                k = column.get(sym)
+                if k is None or filled[k]:
+                    continue
+                close[rows, k] = p.close[:, j]
+                high[rows, k] = p.high[:, j]
+                low[rows, k] = p.low[:, j]
+                volume[rows, k] = p.volume[:, j]
+                filled[k] = True
+        return cls(dates, pd.Index(order), close, volume, high, low)
+
+    # ── access ────────────────────────────────────────────────────────────
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol) -> bool:
+        return symbol in self.symbols
+
+    @property
+    def nbytes(self) -> int:
+        arrays = self.close.nbytes + self.high.nbytes + self.low.nbytes + self.volume.nbytes
+        return arrays + self.dates.nbytes + self.symbols.memory_usage(deep=True)
+
+    def _columns(self, symbols: Optional[List[str]]) -> np.ndarray:
+        if symbols is None:
+            return np.arange(len(self.symbols))
+        pos = self.symbols.get_indexer(list(dict.fromkeys(symbols)))
+        return pos[pos >= 0]
+
+    def field(self, field: str, symbols: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        One field as a float64 dates × symbols frame in the order of
+        *symbols* (missing symbols left out), like `metrics.field_matrix`.
+        """
+        cols = self._columns(symbols)
+        if field in PRICE_FIELDS:
+            values = getattr(self, field.lower())[:, cols].astype(float)
+        elif field == "Volume":
+            raw = self.volume[:, cols]
+            values = np.where(raw == MISSING_VOLUME, np.nan, raw.astype(float))
+        else:
+            raise KeyError(f"{field!r} is not kept in CompactHistory (only {COMPACT_FIELDS})")
+        return pd.DataFrame(values, index=self.dates, columns=self.symbols[cols])
+
+    def dropna(self) -> "CompactHistory":
+        """Drop dates on which no symbol has a close."""
+        keep = ~np.isnan(self.close).all(axis=1)
+        return CompactHistory(self.dates[keep], self.symbols, self.close[keep], self.volume[keep],
+                              self.high[keep], self.low[keep])
+
+    def select(self, symbols: List[str]) -> "CompactHistory":
+        cols = self._columns(symbols)
+        return CompactHistory(self.dates, self.symbols[cols], self.close[:, cols], self.volume[:, cols],
+                              self.high[:, cols], self.low[:, cols])
+
+    def get(self, symbol: str, default=None):
+        """
+        Close/High/Low/Volume frame of one symbol, so per-symbol code written for the
+        ticker-grouped frame (`data.get(sym, {}).get("Close")`) keeps working.
+        """
+        if symbol not in self.symbols:
+            return default
+        return self.to_frame([symbol])[symbol]
+
+    def to_frame(self, symbols: Optional[List[str]] = None) -> pd.DataFrame:
+        """Ticker-grouped float64 frame with the compact fields."""
+        parts = {f: self.field(f, symbols) for f in COMPACT_FIELDS}
+        frame = pd.concat(parts, axis=1, names=["Price", "Ticker"]).swaplevel(axis=1)
+        return frame.sort_index(axis=1, level=0, sort_remaining=False)
+
+
+# ── memory report ───────────────────────────────────────────────────────────
+def deep_nbytes(obj, _seen=None) -> int:
+    """Approximate bytes held by *obj* (frames, arrays, histories and containers of them)."""
+    _seen = _seen if _seen is not None else set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    if isinstance(obj, CompactHistory):
+        return obj.nbytes
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(deep_nbytes(k, _seen) + deep_nbytes(v, _seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(deep_nbytes(v, _seen) for v in obj)
+    if hasattr(obj, "__dict__") and not isinstance(obj, type):
+        return sys.getsizeof(obj) + deep_nbytes(vars(obj), _seen)
+    return sys.getsizeof(obj)
+
+
+def memory_report(objects: Dict[str, object]) -> pd.DataFrame:
+    """
+    Bytes held by each named object, largest first, e.g.
+    `memory_report(dict(st.session_state))`.
+    """
+    rows = [{"Object": name, "Type": type(obj).__name__, "MB": deep_nbytes(obj) / 1e6}
+            for name, obj in objects.items()]
+    report = pd.DataFrame(rows, columns=["Object", "Type", "MB"])
+    return report.sort_values("MB", ascending=False).reset_index(drop=True)
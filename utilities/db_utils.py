@@ -1,50 +1,154 @@
+import threading
+from contextlib import contextmanager
+from typing import List, Tuple
+
 import pandas as pd
 import psycopg2
+import psycopg2.pool
 import streamlit as st
-from utilities.ticker_info import get_ticker_stats, download_ticker_data
+from american import load_metadata
+from utilities.ticker_info import get_ticker_stats
+from utilities.scan_cache import get_cached_stats
+from utilities.symbol_cache import get_histories
+from utilities.telemetry import span
+
+# errors of a connection the server dropped (or that broke mid-statement)
+_DISCONNECTED = (psycopg2.OperationalError, psycopg2.InterfaceError)
 
-def get_connection():
+@st.cache_resource
+def _get_pool() -> psycopg2.pool.ThreadedConnectionPool:
+    """One connection pool per server process, shared by all sessions and reruns."""
     cfg = st.secrets["supabase"]
-    conn = psycopg2.connect(
+    return psycopg2.pool.ThreadedConnectionPool(
+        minconn=1,
+        maxconn=int(cfg.get("pool_max", 10)),
         host=cfg["host"],
         database=cfg["database"],
         user=cfg["user"],
         password=cfg["password"],
         port=cfg["port"]
     )
-    return conn
 
-def insert_portfolios_row(email: str, cap_size: str, ticker: str) -> bool:
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT 1 FROM portfolios WHERE email=%s AND ticker=%s", (email, ticker))
-    exists = cur.fetchone()
-    if exists:
-        conn.close()
-        return False
-    cur.execute(
-        "INSERT INTO portfolios (email, cap_size, ticker) VALUES (%s, %s, %s)",
-        (email, cap_size, ticker)
+@st.cache_resource
+def _pool_slots() -> threading.BoundedSemaphore:
+    """One slot per pooled connection: borrowers wait here instead of getting `PoolError`."""
+    return threading.BoundedSemaphore(_get_pool().maxconn)
+
+@contextmanager
+def pooled_connection(timeout: float = 30):
+    """
+    Borrow a connection from the pool; commit on success, roll back on error.
+    When all `pool_max` connections are in use this waits up to *timeout*
+    seconds for one to be returned (then raises `PoolError`).
+    """
+    pool, slots = _get_pool(), _pool_slots()
+    if not slots.acquire(timeout=timeout):
+        raise psycopg2.pool.PoolError(f"no database connection free after {timeout:.0f} s")
+    try:
+        conn = pool.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn, close=bool(conn.closed))
+    finally:
+        slots.release()
+
+def _execute(sql: str, params, timeout: float = 30) -> list:
+    """
+    Run one statement on a pooled connection and return its rows. It runs
+    in autocommit mode (a single statement is atomic by itself), so it is
+    one round trip: no BEGIN/COMMIT and no liveness ping. Connections the
+    server dropped (Supabase closes idle ones) look open until used; if
+    the statement fails because its connection is gone, it runs once more
+    on a fresh one.
+    """
+    for attempt in range(2):
+        conn = None
+        try:
+            with pooled_connection(timeout) as conn:
+                conn.autocommit = True
+                try:
+                    with conn.cursor() as cur:
+                        cur.execute(sql, params)
+                        return cur.fetchall()
+                finally:
+                    if not conn.closed:
+                        conn.autocommit = False
+        except _DISCONNECTED:
+            if attempt or conn is None or not conn.closed:
+                raise
+
+# insert only the tickers this user does not have yet, return those
+_UPSERT_SQL = """
+    INSERT INTO portfolios (email, cap_size, ticker)
+    SELECT %(email)s, %(cap_size)s, t.ticker
+    FROM unnest(%(tickers)s::text[]) AS t(ticker)
+    WHERE NOT EXISTS (
+        SELECT 1 FROM portfolios p WHERE p.email = %(email)s AND p.ticker = t.ticker
     )
-    conn.commit()
-    conn.close()
-    return True
+    ON CONFLICT DO NOTHING
+    RETURNING ticker
+"""
+
+@span("db.upsert")
+def upsert_portfolio_rows(email: str, cap_size: str, tickers: List[str], conn=None) -> Tuple[List[str], List[str]]:
+    """
+    Save many tickers for *email* in a single statement.
+
+    Args:
+        email (str): portfolio owner.
+        cap_size (str): universe label the tickers belong to.
+        tickers (List[str]): tickers to save (duplicates in the list are ignored).
+        conn: optional open connection (e.g. a local Postgres in tests); the
+            pooled connection is used otherwise.
+
+    Returns:
+        (new, duplicates): tickers that were inserted, and tickers that were
+        already saved for this user.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return [], []
+
+    params = {"email": email, "cap_size": cap_size, "tickers": tickers}
+    if conn is None:
+        inserted = {r[0] for r in _execute(_UPSERT_SQL, params)}
+    else:
+        with conn.cursor() as cur:
+            cur.execute(_UPSERT_SQL, params)
+            inserted = {r[0] for r in cur.fetchall()}
+        conn.commit()
+
+    new = [t for t in tickers if t in inserted]
+    duplicates = [t for t in tickers if t not in inserted]
+    return new, duplicates
+
+def insert_portfolios_row(email: str, cap_size: str, ticker: str) -> bool:
+    new, _ = upsert_portfolio_rows(email, cap_size, [ticker])
+    return bool(new)
 
 def fetch_portfolio_from_db(email: str, cap_size: str):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT ticker FROM portfolios WHERE email=%s AND cap_size=%s",
-        (email, cap_size)
-    )
-    symbols = [r[0] for r in cur.fetchall()]
-    conn.close()
+    with span("db.fetch_portfolio"):
+        rows = _execute("SELECT ticker FROM portfolios WHERE email=%s AND cap_size=%s", (email, cap_size))
+    symbols = [r[0] for r in rows]
 
     if not symbols:
         return [], pd.DataFrame()
 
-    frames = download_ticker_data(symbols=symbols)
-    all_ticker_data = pd.concat(frames, axis=1)
-    ticker_stats = get_ticker_stats(data=all_ticker_data, symbols=symbols)
+    # stats published by the warm-up worker / a scan cover the whole universe
+    cached_stats = get_cached_stats(cap_size)
+    if cached_stats is not None and set(symbols) <= set(cached_stats.base["Symbol"]):
+        return symbols, cached_stats.select(symbols).for_window(30)
+
+    # per-symbol history shared across users: only uncached symbols are downloaded
+    all_ticker_data = get_histories(symbols)
+    ticker_stats = get_ticker_stats(
+        data=all_ticker_data, symbols=symbols, vectorized=True, metadata=load_metadata(cap_size)
+    )
     ticker_stats_df = pd.DataFrame(ticker_stats)
     return symbols, ticker_stats_df
@@ -0,0 +1,136 @@
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import pandas as pd
+
+from utilities.telemetry import inc, span
+logger = logging.getLogger(__name__)
+
+# ----------------------------------------------------------------------
+# Chunked download scheduler: runs several chunks at once (bounded by
+# `max_workers`), retries failed chunks with exponential backoff and does
+# a second pass for symbols that came back empty.
+# ----------------------------------------------------------------------
+
+
+@dataclass
+class ChunkReport:
+    """Outcome of one chunk download (shown in the progress text / logs)."""
+    chunk: int
+    symbols: int
+    missing: int
+    attempts: int
+    seconds: float
+    second_pass: bool = False
+
+
+def returned_symbols(frame: pd.DataFrame) -> set:
+    """Symbols of a ticker-grouped frame that have at least one Close value."""
+    if frame is None or frame.empty or not isinstance(frame.columns, pd.MultiIndex):
+        return set()
+    closes = frame.xs("Close", axis=1, level=1)
+    return set(closes.columns[closes.notna().any().to_numpy()])
+
+
+def _fetch_with_retries(fetch: Callable[..., pd.DataFrame], chunk: List[str], retries: int,
+                        backoff: float, **kwargs) -> Tuple[pd.DataFrame, int]:
+    """Call `fetch(chunk, **kwargs)`, retrying on exceptions. Returns (frame, attempts)."""
+    for attempt in range(1, retries + 2):
+        try:
+            return fetch(chunk, **kwargs), attempt
+        except Exception as e:
+            if attempt > retries:
+                logger.warning("chunk of %d symbols failed after %d attempts: %s", len(chunk), attempt, e)
+                inc("lst_chunk_failures_total")
+                return pd.DataFrame(), attempt
+            inc("lst_chunk_retries_total")
+            time.sleep(backoff * 2 ** (attempt - 1))
+
+
+def _run_pass(fetch, symbols, chunk_size, max_workers, retries, backoff, progress_cb,
+              second_pass=False, chunk_cb=None, **kwargs) -> Tuple[List[pd.DataFrame], List[ChunkReport]]:
+    chunks = [symbols[i : i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+    frames, reports = [], []
+
+    def _timed(n, chunk):
+        t0 = time.perf_counter()
+        with span("download.chunk", symbols=len(chunk), second_pass=second_pass):
+            frame, attempts = _fetch_with_retries(fetch, chunk, retries, backoff, **kwargs)
+        got = returned_symbols(frame)
+        if not got:
+            frame = pd.DataFrame()
+        elif len(got) < len(frame.columns.get_level_values(0).unique()):
+            # drop all-NaN placeholder columns so a second-pass hit does not
+            # end up as a duplicate column after concat
+            frame = frame.loc[:, frame.columns.get_level_values(0).isin(got)]
+        missing = len(chunk) - len(got & set(chunk))
+        inc("lst_chunk_symbols_total", len(chunk) - missing, result="ok")
+        inc("lst_chunk_symbols_total", missing, result="missing")
+        return frame, ChunkReport(n, len(chunk), missing, attempts, time.perf_counter() - t0, second_pass)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # each chunk runs in a copy of our context, so its spans count for the page run (`track_run`)
+        futures = [pool.submit(contextvars.copy_context().run, _timed, n, chunk)
+                   for n, chunk in enumerate(chunks, start=1)]
+        # progress is reported from the calling thread (Streamlit widgets
+        # cannot be touched from worker threads)
+        for done, fut in enumerate(as_completed(futures), start=1):
+            frame, report = fut.result()
+            frames.append(frame)
+            reports.append(report)
+            logger.info("download chunk %s", report)
+            if chunk_cb is not None and not frame.empty:
+                chunk_cb(frame, report)
+            if progress_cb is not None:
+                progress_cb(done, len(chunks), report)
+    return frames, reports
+
+
+def scheduled_download(fetch: Callable[..., pd.DataFrame], symbols: List[str], chunk_size: int = 50,
+                       max_workers: int = 8, retries: int = 2, backoff: float = 1.0,
+                       refetch_missing: bool = True, refetch_timeout: Optional[float] = 10,
+                       progress_cb: Optional[Callable] = None, chunk_cb: Optional[Callable] = None, **kwargs):
+    """
+    Download *symbols* chunk by chunk with bounded parallelism.
+
+    Args:
+        fetch (callable): `fetch(chunk, **kwargs)` returning a ticker-grouped frame.
+        symbols (List[str]): symbols to download.
+        chunk_size (int): symbols per chunk.
+        max_workers (int): chunks in flight at the same time.
+        retries (int): extra attempts per chunk when `fetch` raises.
+        backoff (float): seconds before the first retry, doubled after each.
+        refetch_missing (bool): run a second pass for symbols that came back empty.
+        refetch_timeout (float): `timeout` passed to `fetch` on the second pass.
+        progress_cb (callable): `progress_cb(done, total, report)` after each chunk.
+        chunk_cb (callable): `chunk_cb(frame, report)` with every non-empty chunk
+            as soon as it arrives (in the calling thread, before `progress_cb`).
+        **kwargs: forwarded to `fetch` (period, start, interval, timeout, ...).
+
+    Returns:
+        (frames, reports, missing): the chunk frames, one `ChunkReport` per
+        chunk, and the symbols still missing after both passes.
+    """
+    frames, reports = _run_pass(fetch, symbols, chunk_size, max_workers, retries, backoff,
+                                progress_cb, chunk_cb=chunk_cb, **kwargs)
+
+    got = set().union(*(returned_symbols(f) for f in frames)) if frames else set()
+    missing = [s for s in symbols if s not in got]
+    if missing and refetch_missing:
+        logger.info("refetching %d symbols that came back empty", len(missing))
+        if refetch_timeout is not None:
+            kwargs["timeout"] = refetch_timeout
+        more, more_reports = _run_pass(fetch, missing, chunk_size, max_workers, retries, backoff,
+                                       progress_cb, second_pass=True, chunk_cb=chunk_cb, **kwargs)
+        frames += more
+        reports += more_reports
+        got |= set().union(*(returned_symbols(f) for f in more))
+        missing = [s for s in missing if s not in got]
+
+    if missing:
+        logger.warning("%d symbols returned no data: %s", len(missing), missing[:20])
+    return [f for f in frames if not f.empty], reports, missing
@@ -0,0 +1,111 @@
+import math
+from collections import deque
+from typing import Optional
+
+import pandas as pd
+
+# ----------------------------------------------------------------------
+# Incremental per-symbol indicator state. Instead of recomputing RSI and
+# averages over the whole history on every poll, each symbol keeps a
+# bounded window of recent bars plus running sums, so applying one new
+# bar is a constant amount of work. The intraday watcher
+# (`utilities.intraday`) keeps one per symbol in memory. Daily refreshes
+# do not keep (or persist) per-symbol state: the vectorized
+# `utilities.metrics` recomputes every look-back and indicator for a whole
+# universe in one pass, which a per-symbol running state cannot answer.
+# ----------------------------------------------------------------------
+
+
+class IndicatorState:
+    """
+    Running indicator state for one symbol.
+
+    Args:
+        rsi_n (int): RSI period (simple averages, same definition as `_rsi`).
+        vol_n (int): number of bars in the average-volume window.
+    """
+
+    def __init__(self, rsi_n: int = 14, vol_n: int = 30):
+        self.rsi_n = rsi_n
+        self.vol_n = vol_n
+        self.bars: deque = deque(maxlen=max(rsi_n + 1, vol_n))
+        self.n_bars = 0  # total bars ever applied
+        self._gain_sum = 0.0
+        self._loss_sum = 0.0
+        self._deltas: deque = deque(maxlen=rsi_n)
+        self._vol_sum = 0.0
+        self._vols: deque = deque(maxlen=vol_n)
+
+    # ── updates ───────────────────────────────────────────────────────────
+    @property
+    def last_date(self) -> Optional[pd.Timestamp]:
+        return self.bars[-1][0] if self.bars else None
+
+    @property
+    def last_close(self) -> float:
+        return self.bars[-1][1] if self.bars else math.nan
+
+    def _append(self, date: pd.Timestamp, close: float, volume: float):
+        if self.bars:
+            delta = close - self.bars[-1][1]
+            if len(self._deltas) == self._deltas.maxlen:
+                old = self._deltas[0]
+                self._gain_sum -= max(old, 0.0)
+                self._loss_sum -= max(-old, 0.0)
+            self._deltas.append(delta)
+            self._gain_sum += max(delta, 0.0)
+            self._loss_sum += max(-delta, 0.0)
+
+        if not math.isnan(volume):
+            if len(self._vols) == self._vols.maxlen:
+                self._vol_sum -= self._vols[0]
+            self._vols.append(volume)
+            self._vol_sum += volume
+
+        self.bars.append((date, close, volume))
+        self.n_bars += 1
+
+    def _rebuild(self):
+        """Recompute the running sums from the kept bars (bounded work)."""
+        closes = [b[1] for b in self.bars]
+        deltas = [b - a for a, b in zip(closes, closes[1:])][-self.rsi_n:]
+        vols = [b[2] for b in self.bars if not math.isnan(b[2])][-self.vol_n:]
+        self._deltas = deque(deltas, maxlen=self.rsi_n)
+        self._gain_sum = sum(max(d, 0.0) for d in deltas)
+        self._loss_sum = sum(max(-d, 0.0) for d in deltas)
+        self._vols = deque(vols, maxlen=self.vol_n)
+        self._vol_sum = sum(vols)
+
+    def update(self, closes: pd.Series, volumes: Optional[pd.Series] = None):
+        """
+        Apply new bars. Bars older than `last_date` are ignored; a bar dated
+        `last_date` replaces the stored one (the last bar may have been
+        partial when it was first seen).
+        """
+        closes = closes.dropna().sort_index()
+        if volumes is None:
+            volumes = pd.Series(math.nan, index=closes.index)
+        volumes = volumes.reindex(closes.index)
+
+        for date, close, volume in zip(closes.index, closes.to_numpy(float), volumes.to_numpy(float)):
+            last = self.last_date
+            if last is not None and date < last:
+                continue
+            if last is not None and date == last:
+                self.bars.pop()
+                self.n_bars -= 1
+                self._rebuild()
+            self._append(date, float(close), float(volume))
+
+    # ── readouts ──────────────────────────────────────────────────────────
+    def rsi(self) -> float:
+        if len(self._deltas) < self.rsi_n:
+            return math.nan
+        gain, loss = self._gain_sum / self.rsi_n, self._loss_sum / self.rsi_n
+        # running sums can drift to tiny non-zero values; treat those as 0
+        if loss <= 1e-12:
+            return 100.0 if gain > 1e-12 else math.nan
+        return 100 - 100 / (1 + gain / loss)
+
+    def avg_volume(self) -> float:
+        return self._vol_sum / len(self._vols) if self._vols else math.nan
@@ -0,0 +1,290 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional
+
+import numpy as np
+
+from utilities.telemetry import span
+
+# ----------------------------------------------------------------------
+# Indicator registry over the wide dates × symbols matrices. All
+# indicators of a scan share one `IndicatorContext`: the Close/High/Low/
+# Volume matrices are packed once (each column's bars moved to the bottom,
+# so a symbol with missing days still has contiguous series) and every
+# intermediate (rolling sums, EMAs, true range, log returns, ...) is
+# computed the first time an indicator asks for it and reused by the
+# others. Adding an indicator is one registered function, not one more
+# pass per symbol.
+# ----------------------------------------------------------------------
+TRADING_DAYS = 252
+
+
+class IndicatorContext:
+    """
+    Packed price matrices plus a memo of the intermediates built on them.
+
+    Args:
+        close (np.ndarray): dates × symbols closes, NaN where there is no bar.
+        high, low, volume (np.ndarray): same shape, optional (NaN where unknown).
+    """
+
+    def __init__(self, close: np.ndarray, high: Optional[np.ndarray] = None,
+                 low: Optional[np.ndarray] = None, volume: Optional[np.ndarray] = None):
+        valid = ~np.isnan(close)
+        n_rows = close.shape[0]
+        # destination of every bar: column j's last bar goes to the last row
+        from_end = np.cumsum(valid[::-1], axis=0)[::-1]
+        self._rows, self._cols = np.nonzero(valid)
+        self._dest = n_rows - from_end[self._rows, self._cols]
+        self.shape = close.shape
+        self.n_valid = valid.sum(axis=0)
+        self._raw = {"close": close, "high": high, "low": low, "volume": volume}
+        self._memo: Dict[tuple, np.ndarray] = {}
+
+    def shared(self, key: tuple, build: Callable[[], np.ndarray]) -> np.ndarray:
+        """Return the intermediate *key*, building it on first use."""
+        if key not in self._memo:
+            self._memo[key] = build()
+        return self._memo[key]
+
+    def _pack(self, values: Optional[np.ndarray]) -> np.ndarray:
+        out = np.full(self.shape, np.nan)
+        if values is not None:
+            out[self._dest, self._cols] = values[self._rows, self._cols]
+        return out
+
+    # ── base series ───────────────────────────────────────────────────────
+    def series(self, name: str) -> np.ndarray:
+        """Packed "close", "high", "low" or "volume", or a derived series (see `_DERIVED`)."""
+        if name in self._raw:
+            return self.shared((name,), lambda: self._pack(self._raw[name]))
+        return self.shared((name,), lambda: _DERIVED[name](self))
+
+    def last(self, values: np.ndarray) -> np.ndarray:
+        """Value at every symbol's last bar."""
+        return values[-1]
+
+    def tail(self, name: str, n: int) -> np.ndarray:
+        """Last *n* rows of a packed base series, without packing the whole history."""
+        def build():
+            if (name,) in self._memo:
+                return self._memo[(name,)][-n:]
+            out = np.full((n, self.shape[1]), np.nan)
+            keep = self._dest >= self.shape[0] - n
+            rows, cols = self._rows[keep], self._cols[keep]
+            out[self._dest[keep] - (self.shape[0] - n), cols] = self._raw[name][rows, cols]
+            return out
+        return self.shared(("tail", name, n), build)
+
+    # ── shared building blocks ────────────────────────────────────────────
+    def rolling_sum(self, name: str, n: int) -> np.ndarray:
+        """Sum of the last *n* values of a series (NaN until the window is full)."""
+        def build():
+            csum, count = self._cumsums(name)
+            total, seen = csum.copy(), count.copy()
+            total[n:] -= csum[:-n]
+            seen[n:] -= count[:-n]
+            return np.where(seen == n, total, np.nan)
+        return self.shared(("rolling_sum", name, n), build)
+
+    def _cumsums(self, name: str):
+        """Running sum and running count of the non-NaN values (shared by every window length)."""
+        def build():
+            x = self.series(name)
+            ok = ~np.isnan(x)
+            return np.cumsum(np.where(ok, x, 0.0), axis=0), np.cumsum(ok, axis=0)
+        return self.shared(("cumsum", name), build)
+
+    def sma(self, name: str, n: int) -> np.ndarray:
+        return self.shared(("sma", name, n), lambda: self.rolling_sum(name, n) / n)
+
+    def rolling_std(self, name: str, n: int, ddof: int = 0) -> np.ndarray:
+        """Rolling standard deviation from the shared sums of x and x²."""
+        def build():
+            mean = self.sma(name, n)
+            sq = self.rolling_sum(f"{name}_sq", n)
+            var = np.clip(sq / n - mean ** 2, 0, None) * n / (n - ddof)
+            return np.sqrt(var)
+        return self.shared(("rolling_std", name, n, ddof), build)
+
+    def ema(self, name: str, span: Optional[int] = None, alpha: Optional[float] = None) -> np.ndarray:
+        """
+        Exponential moving average (pandas `ewm(adjust=False)`), seeded with
+        each column's first value. One step per date over all symbols at once.
+        """
+        alpha = alpha if alpha is not None else 2 / (span + 1)
+
+        def build():
+            x = self.series(name)
+            out = np.full_like(x, np.nan)
+            prev = np.full(x.shape[1], np.nan)
+            for t in range(x.shape[0]):
+                xt = x[t]
+                prev = np.where(np.isnan(prev), xt, prev + alpha * (xt - prev))
+                out[t] = prev
+            return out
+        return self.shared(("ema", name, round(alpha, 12)), build)
+
+
+def _square_series(base: str):
+    return lambda ctx: ctx.series(base) ** 2
+
+
+def _true_range(ctx: IndicatorContext) -> np.ndarray:
+    high, low, close = ctx.series("high"), ctx.series("low"), ctx.series("close")
+    prev = np.vstack([np.full((1, close.shape[1]), np.nan), close[:-1]])
+    # fmax skips the missing previous close on a symbol's first bar
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+    # without High/Low there is no true range (NaN), not just |close diff|
+    return np.where(np.isnan(high) | np.isnan(low), np.nan, tr)
+
+
+def _log_return(ctx: IndicatorContext) -> np.ndarray:
+    close = ctx.series("close")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.vstack([np.full((1, close.shape[1]), np.nan), np.log(close[1:] / close[:-1])])
+
+
+_DERIVED: Dict[str, Callable[[IndicatorContext], np.ndarray]] = {
+    "close_sq": _square_series("close"),
+    "log_return": _log_return,
+    "log_return_sq": _square_series("log_return"),
+    "true_range": _true_range,
+    "macd": lambda ctx: ctx.ema("close", 12) - ctx.ema("close", 26),
+}
+
+
+def bars_since_cross(diff: np.ndarray) -> np.ndarray:
+    """
+    Signed number of bars since *diff* (fast − slow, packed) last changed
+    sign: +n means the fast line crossed above the slow one n bars ago, −n
+    below. Without a cross in the data, the bars the sign has held so far.
+    """
+    sign = np.sign(diff)
+    last = sign[-1]
+    other = ~np.isnan(sign) & (sign != last)
+    n_rows = sign.shape[0]
+    last_other = n_rows - 1 - np.argmax(other[::-1], axis=0)
+    same = (~np.isnan(sign)).sum(axis=0)
+    held = np.where(other.any(axis=0), n_rows - 1 - last_other, same)
+    return np.where(np.isnan(last) | (last == 0), np.nan, last * held)
+
+
+# ── registry ────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class Indicator:
+    """
+    One registered indicator.
+
+    Attributes:
+        name (str): column name in the stats tables.
+        label (str): short text for the cards.
+        compute (callable): compute(ctx) → value at every symbol's last bar.
+        min_bars (int): bars a symbol needs for a meaningful value (else NaN).
+        fmt (str): format spec for the cards.
+        fields (tuple): price fields it reads besides "close" (e.g. "high").
+    """
+    name: str
+    label: str
+    compute: Callable[[IndicatorContext], np.ndarray]
+    min_bars: int
+    fmt: str = ".2f"
+    fields: tuple = ()
+
+
+INDICATORS: Dict[str, Indicator] = {}
+
+
+def indicator(name: str, label: str, min_bars: int, fmt: str = ".2f", fields: tuple = ()):
+    """Register `compute(ctx)` under *name* (decorator)."""
+    def register(compute):
+        INDICATORS[name] = Indicator(name, label, compute, min_bars, fmt, fields)
+        return compute
+    return register
+
+
+def required_fields(names: Iterable[str]) -> set:
+    """Price fields besides "close" the indicators *names* read (the others need not be loaded)."""
+    return {f for name in names for f in INDICATORS[name].fields}
+
+
+@indicator("RSI", "RSI-14", min_bars=15, fmt=".1f")
+def _rsi14(ctx):
+    # simple averages of the last 14 moves, same as `ticker_info._rsi`;
+    # only the last 15 closes are touched, so RSI alone stays cheap
+    delta = np.diff(ctx.tail("close", 15), axis=0)
+    gain = np.clip(delta, 0, None).mean(axis=0)
+    loss = -np.clip(delta, None, 0).mean(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + gain / np.where(loss == 0, np.nan, loss))
+    return np.where((gain > 0) & (loss == 0), 100.0, rsi)
+
+
+@indicator("SMACross", "SMA 20/50 cross", min_bars=50, fmt="+.0f")
+def _sma_cross(ctx):
+    return bars_since_cross(ctx.sma("close", 20) - ctx.sma("close", 50))
+
+
+@indicator("EMACross", "EMA 12/26 cross", min_bars=26, fmt="+.0f")
+def _ema_cross(ctx):
+    return bars_since_cross(ctx.series("macd"))
+
+
+@indicator("MACD", "MACD", min_bars=35)
+def _macd(ctx):
+    return ctx.last(ctx.series("macd"))
+
+
+@indicator("MACDHist", "MACD hist", min_bars=35, fmt="+.2f")
+def _macd_hist(ctx):
+    macd = ctx.series("macd")
+    return ctx.last(macd - ctx.ema("macd", 9))
+
+
+@indicator("BBWidth", "BB width %", min_bars=20, fmt=".1f")
+def _bb_width(ctx):
+    # (upper − lower) / middle of 20-bar ±2σ bands
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return ctx.last(4 * ctx.rolling_std("close", 20) / ctx.sma("close", 20)) * 100
+
+
+@indicator("ATR", "ATR-14 %", min_bars=15, fmt=".1f", fields=("high", "low"))
+def _atr(ctx):
+    # Wilder's smoothing of the true range, as % of the last close
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return ctx.last(ctx.ema("true_range", alpha=1 / 14)) / ctx.last(ctx.series("close")) * 100
+
+
+@indicator("RealizedVol", "Vol-20 %", min_bars=21, fmt=".0f")
+def _realized_vol(ctx):
+    # annualized standard deviation of the last 20 daily log returns
+    return ctx.last(ctx.rolling_std("log_return", 20, ddof=1)) * np.sqrt(TRADING_DAYS) * 100
+
+
+INDICATOR_COLUMNS = [name for name in INDICATORS if name != "RSI"]  # RSI is already in STATS_COLUMNS
+
+
+def indicator_values(close: np.ndarray, high: Optional[np.ndarray] = None, low: Optional[np.ndarray] = None,
+                     volume: Optional[np.ndarray] = None, names: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    All (or the named) registered indicators at every symbol's last bar,
+    computed in one pass over the dates × symbols matrices.
+
+    Args:
+        close (np.ndarray): dates × symbols closes (NaN where there is no bar).
+        high, low, volume (np.ndarray): same shape, optional.
+        names (Iterable[str]): indicators to compute (default: all registered).
+
+    Returns:
+        Dict[str, np.ndarray]: indicator name → one value per column, NaN
+        where the symbol has fewer than the indicator's `min_bars` bars.
+    """
+    names = list(names) if names is not None else list(INDICATORS)
+    with span("indicators", symbols=close.shape[1], indicators=len(names)):
+        ctx = IndicatorContext(close, high, low, volume)
+        out = {}
+        for name in names:
+            ind = INDICATORS[name]
+            with np.errstate(invalid="ignore"):
+                values = np.asarray(ind.compute(ctx), dtype=float)
+            out[name] = np.where(ctx.n_valid >= ind.min_bars, values, np.nan)
+    return out
@@ -0,0 +1,130 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utilities.download_scheduler import scheduled_download
+from utilities.indicator_state import IndicatorState
+from utilities.metrics import STATS_COLUMNS
+from utilities.providers import MarketDataProvider, get_provider
+from utilities.symbol_cache import get_histories
+
+# ----------------------------------------------------------------------
+# Live intraday watch. A watcher polls minute bars for a fixed symbol
+# list, asking the provider only for bars newer than what it already has,
+# and feeds them into per-symbol `IndicatorState`s. Every symbol carries a
+# version number that only moves when its values change, so the page can
+# tell which cards need redrawing.
+# ----------------------------------------------------------------------
+
+
+class IntradayWatcher:
+    """
+    Incrementally updated minute-bar stats for *symbols*.
+
+    Args:
+        symbols (List[str]): symbols to watch.
+        interval (str): bar size to poll ("1m", "5m", ...).
+        provider (MarketDataProvider): backend; defaults to `get_provider()`.
+        chunk_size (int): symbols per provider call.
+        max_workers (int): chunks fetched at the same time on each poll.
+            600 symbols in chunks of 25 on 16 workers is two rounds of
+            requests, well inside a 60-second cadence.
+    """
+
+    def __init__(self, symbols: List[str], interval: str = "1m",
+                 provider: Optional[MarketDataProvider] = None, chunk_size: int = 25, max_workers: int = 16):
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.provider = provider or get_provider()
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.states: Dict[str, IndicatorState] = {}
+        self.versions: Dict[str, int] = {s: 0 for s in self.symbols}
+        self.last_poll = 0.0
+        self.last_poll_seconds = 0.0
+        self._daily_closes: Dict[str, pd.Series] = {}
+        self._lock = threading.Lock()
+
+    def _load_daily_closes(self):
+        """Daily closes (shared per-symbol cache) for the previous-close reference."""
+        closes = get_histories(self.symbols).field("Close")
+        for sym in closes.columns:
+            self._daily_closes[sym] = closes[sym].dropna()
+
+    def _prev_close(self, sym: str, state: IndicatorState) -> float:
+        closes = self._daily_closes.get(sym)
+        if closes is None or closes.empty or state.last_date is None:
+            return np.nan
+        session_day = state.last_date.tz_localize(None).normalize() if state.last_date.tzinfo else state.last_date.normalize()
+        before = closes[closes.index < session_day]
+        return float(before.iloc[-1]) if not before.empty else np.nan
+
+    def poll(self) -> List[str]:
+        """
+        Fetch bars newer than each symbol's last bar and apply them.
+        Returns the symbols whose values changed.
+        """
+        t0 = time.perf_counter()
+        if not self._daily_closes:
+            self._load_daily_closes()
+
+        # symbols share their last bar time almost always → one group per poll
+        groups: Dict[Optional[pd.Timestamp], List[str]] = {}
+        for sym in self.symbols:
+            state = self.states.get(sym)
+            groups.setdefault(state.last_date if state else None, []).append(sym)
+
+        changed = []
+        for start, group in groups.items():
+            frames, _, _ = scheduled_download(
+                self.provider.fetch, group, chunk_size=self.chunk_size, max_workers=self.max_workers, refetch_missing=False,
+                period="1d", start=start, interval=self.interval,
+            )
+            for frame in frames:
+                for sym in frame.columns.get_level_values(0).unique():
+                    state = self.states.get(sym)
+                    if state is None:
+                        state = self.states[sym] = IndicatorState()
+                    before = (state.last_date, state.last_close, state.n_bars)
+                    bars = frame[sym]
+                    state.update(bars["Close"], bars.get("Volume"))
+                    if (state.last_date, state.last_close, state.n_bars) != before:
+                        self.versions[sym] = self.versions.get(sym, 0) + 1
+                        changed.append(sym)
+
+        self.last_poll = time.time()
+        self.last_poll_seconds = time.perf_counter() - t0
+        return changed
+
+    def refresh(self, max_age: float) -> List[str]:
+        """Poll unless another session did so less than *max_age* seconds ago."""
+        with self._lock:
+            if time.time() - self.last_poll < max_age:
+                return []
+            return self.poll()
+
+    def stats(self) -> pd.DataFrame:
+        """Card rows: Change vs. previous close, last price, RSI-14 and average volume of the bars."""
+        rows = []
+        for sym in self.symbols:
+            state = self.states.get(sym)
+            if state is None or not state.bars:
+                continue
+            now, prev = state.last_close, self._prev_close(sym, state)
+            rows.append({
+                "Symbol": sym, "Sector": "-",
+                "Change": (now / prev - 1) * 100, "Today": now, "Ago": prev,
+                "RSI": state.rsi(), "AvgVol": state.avg_volume(),
+                "Version": self.versions.get(sym, 0),
+            })
+        return pd.DataFrame(rows, columns=STATS_COLUMNS + ["Version"])
+
+
+@st.cache_resource(max_entries=8)
+def get_watcher(universe: str, symbols: tuple, interval: str = "1m") -> IntradayWatcher:
+    """One watcher per (universe, symbols, interval), shared by all sessions."""
+    return IntradayWatcher(list(symbols), interval=interval)
@@ -0,0 +1,240 @@
+import uuid
+
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+
+from utilities.compact import CompactHistory
+from utilities.indicators import INDICATOR_COLUMNS, INDICATORS, indicator_values, required_fields
+from utilities.telemetry import span
+
+# ----------------------------------------------------------------------
+# Vectorized cross-sectional metrics. Everything here works on the wide
+# dates × symbols matrices taken straight from the ticker-grouped frame
+# that `pd.concat(download_ticker_data(...), axis=1)` produces, so one
+# scan is a handful of NumPy operations instead of a loop per symbol.
+# A `CompactHistory` can be passed wherever a ticker-grouped frame is.
+# ----------------------------------------------------------------------
+STATS_COLUMNS = ["Symbol", "Sector", "Change", "Today", "Ago", "RSI", "AvgVol"]
+LOOKBACK_WINDOWS = range(5, 91)  # the Scanner's "Look-back window (days)" range
+META_COLUMNS = ["Name", "SubIndustry"]  # extra columns `join_metadata` adds after the stats
+ALL_INDICATORS = tuple(INDICATORS)  # `indicators=` of the scans the screener and indicator table run on
+
+
+def field_matrix(data: pd.DataFrame, symbols: List[str], field: str) -> pd.DataFrame:
+    """
+    Pull one price field (e.g. "Close") out of a ticker-grouped frame as a
+    dates × symbols matrix, sorted by date, keeping the order of *symbols*.
+    Symbols missing from *data* are left out. *data* may also be a
+    `CompactHistory`.
+    """
+    if isinstance(data, CompactHistory):
+        return data.field(field, symbols)
+    if data.empty or not isinstance(data.columns, pd.MultiIndex):
+        return pd.DataFrame()
+    mat = data.xs(field, axis=1, level=1)
+    # concat-ed downloads are split into one block per symbol; copy into a
+    # single float block first so the selections below are cheap
+    mat = pd.DataFrame(mat.to_numpy(dtype=float), index=mat.index, columns=mat.columns)
+    mat = mat.loc[:, ~mat.columns.duplicated()]
+    present = [s for s in dict.fromkeys(symbols) if s in mat.columns]
+    return mat[present].sort_index()
+
+
+def tail_window(values: np.ndarray, n: int) -> np.ndarray:
+    """
+    Return the last *n* non-NaN values of every column as an (n, columns)
+    array, oldest first. Columns with fewer than *n* values are NaN-padded
+    at the top. Equivalent to `col.dropna().tail(n)` for all columns at once.
+    """
+    valid = ~np.isnan(values)
+    from_end = np.cumsum(valid[::-1], axis=0)[::-1]  # valid values at/after each row
+    rows, cols = np.nonzero(valid & (from_end <= n))
+    out = np.full((n, values.shape[1]), np.nan)
+    out[n - from_end[rows, cols], cols] = values[rows, cols]
+    return out
+
+
+def last_valid_positions(values: np.ndarray) -> np.ndarray:
+    """Row position of the last non-NaN value per column (-1 if none)."""
+    valid = ~np.isnan(values)
+    pos = values.shape[0] - 1 - np.argmax(valid[::-1], axis=0)
+    return np.where(valid.any(axis=0), pos, -1)
+
+
+def prices_days_ago_many(closes: pd.DataFrame, windows: Iterable[int]) -> np.ndarray:
+    """
+    Vectorized `_price_days_ago` for several look-backs at once: row *i* holds,
+    for every column, the close `windows[i]` calendar days before that
+    column's own last bar, falling back to the most recent earlier bar.
+    One `searchsorted` over the shared calendar replaces one `asof` per
+    symbol and window.
+    """
+    windows = np.asarray(list(windows))
+    values = closes.to_numpy(dtype=float)
+    dates = closes.index.values
+    last_pos = last_valid_positions(values)
+
+    latest = closes.index[np.maximum(last_pos, 0)].normalize().values
+    targets = latest[None, :] - windows[:, None].astype("timedelta64[D]")
+    rows = np.searchsorted(dates, targets.ravel(), side="right").reshape(targets.shape) - 1
+
+    ffilled = closes.ffill().to_numpy(dtype=float)
+    cols = np.broadcast_to(np.arange(values.shape[1]), rows.shape)
+    out = ffilled[np.maximum(rows, 0), cols]
+    return np.where((rows >= 0) & (last_pos >= 0), out, np.nan)
+
+
+def nanmean_tail(values: np.ndarray, n: int) -> np.ndarray:
+    """Mean of the last *n* non-NaN values per column (NaN if none)."""
+    window = tail_window(values, n)
+    count = (~np.isnan(window)).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(count > 0, np.nansum(window, axis=0) / count, np.nan)
+
+
+def compute_ticker_stats(data: pd.DataFrame, symbols: List[str], days_back: int = 30,
+                         metadata: Optional[pd.DataFrame] = None,
+                         indicators: Iterable[str] = ("RSI",)) -> pd.DataFrame:
+    """
+    Whole-matrix version of `get_ticker_stats`.
+
+    Args:
+        data (pd.DataFrame): ticker-grouped frame, columns are (symbol, field).
+        symbols (list of str): symbols to compute metrics for.
+        days_back (int): number of days to look back for the price change.
+        metadata (pd.DataFrame): optional Symbol-indexed Sector/Name table.
+        indicators (Iterable[str]): registered indicators to add (RSI is always computed).
+
+    Returns:
+        pd.DataFrame: one row per symbol with enough history, with the
+        columns `Symbol, Sector, Change, Today, Ago, RSI, AvgVol` that
+        `render_company_blocks` expects (plus the requested indicators).
+    """
+    return compute_window_stats(data, symbols, [days_back], metadata, indicators).for_window(days_back)
+
+
+@dataclass
+class WindowStats:
+    """
+    Stats for every look-back in `windows`, computed from one history load.
+    `for_window(days)` answers a look-back change without touching the data.
+    `version` identifies the data (e.g. for caching screens on it); it
+    survives pickling, so a published scan keeps its version, and
+    `select` derives the same version for the same symbols every time.
+    """
+    base: pd.DataFrame      # Symbol, Sector, Today, RSI, AvgVol, indicators (window independent)
+    ago: np.ndarray         # (len(windows), symbols) close `window` days ago
+    n_valid: np.ndarray     # closes available per symbol (history-length check)
+    windows: List[int]
+    version: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+    def for_window(self, days_back: int) -> pd.DataFrame:
+        """Same frame `compute_ticker_stats(data, symbols, days_back)` returns."""
+        ago = self.ago[self.windows.index(days_back)]
+        stats = self.base.assign(Ago=ago, Change=(self.base["Today"].to_numpy() / ago - 1) * 100)
+        keep = self.n_valid >= days_back + 15
+        extra = [c for c in INDICATOR_COLUMNS + META_COLUMNS if c in stats.columns]
+        columns = STATS_COLUMNS + extra
+        return stats.loc[keep, columns].reset_index(drop=True)
+
+    @classmethod
+    def concat(cls, parts: Iterable["WindowStats"]) -> "WindowStats":
+        """Stack the stats of disjoint symbol sets (e.g. scan shards) computed for the same windows."""
+        parts = list(parts)
+        return cls(pd.concat([p.base for p in parts], ignore_index=True),
+                   np.concatenate([p.ago for p in parts], axis=1),
+                   np.concatenate([p.n_valid for p in parts]), parts[0].windows)
+
+    def select(self, symbols: List[str]) -> "WindowStats":
+        """
+        Restrict to *symbols* (e.g. a random sample of the universe), in
+        their order. Selecting every symbol in order returns the stats
+        themselves; any other selection gets a version derived from ours
+        and the selected symbols, so every session asking for it shares
+        one version (and its cached screens).
+        """
+        pos = pd.Index(self.base["Symbol"]).get_indexer(list(dict.fromkeys(symbols)))
+        pos = pos[pos >= 0]
+        if np.array_equal(pos, np.arange(len(self.base))):
+            return self
+        base = self.base.iloc[pos].reset_index(drop=True)
+        version = uuid.uuid5(uuid.UUID(self.version), ",".join(base["Symbol"])).hex
+        return WindowStats(base, self.ago[:, pos], self.n_valid[pos], self.windows, version)
+
+
+@span("compute_window_stats")
+def compute_window_stats(data: pd.DataFrame, symbols: List[str],
+                         windows: Iterable[int] = LOOKBACK_WINDOWS,
+                         metadata: Optional[pd.DataFrame] = None,
+                         indicators: Iterable[str] = ("RSI",)) -> WindowStats:
+    """
+    Compute Today/AvgVol and the requested indicators (see
+    `utilities.indicators`) once and the Ago close for every window in
+    *windows*, so any look-back in that range is a lookup afterwards.
+    With *metadata* (see `american.load_metadata`) Sector and Name are joined in.
+    RSI is always computed; the others only when asked for (`ALL_INDICATORS`
+    for the scans the screener runs on), they cost several passes more.
+    """
+    windows = list(windows)
+    names = ["RSI"] + [n for n in dict.fromkeys(indicators) if n != "RSI"]
+    closes = field_matrix(data, symbols, "Close")
+    if closes.empty:
+        return WindowStats(pd.DataFrame(columns=["Symbol", "Sector", "Today", "AvgVol"] + names),
+                           np.empty((len(windows), 0)), np.empty(0, dtype=int), windows)
+    needed = required_fields(names) | {"volume"}  # Volume for AvgVol
+
+    def aligned(field):
+        if field.lower() not in needed:
+            return None
+        try:
+            mat = field_matrix(data, symbols, field)
+        except KeyError:  # e.g. a frame without High/Low
+            return None
+        return mat.reindex(index=closes.index, columns=closes.columns).to_numpy(dtype=float)
+
+    close_vals = closes.to_numpy(dtype=float)
+    vol_vals = aligned("Volume")
+    today = close_vals[np.maximum(last_valid_positions(close_vals), 0), np.arange(close_vals.shape[1])]
+    # one fused pass for the requested indicators
+    values = indicator_values(close_vals, aligned("High"), aligned("Low"), vol_vals, names)
+
+    base = pd.DataFrame({
+        "Symbol": closes.columns,
+        "Sector": "-",
+        "Today": today,
+        "RSI": values.pop("RSI"),
+        "AvgVol": nanmean_tail(vol_vals, 30),
+        **values,
+    })
+    if metadata is not None:
+        base = join_metadata(base, metadata)
+    return WindowStats(base, prices_days_ago_many(closes, windows),
+                       (~np.isnan(close_vals)).sum(axis=0), windows)
+
+
+def join_metadata(stats: pd.DataFrame, metadata: pd.DataFrame) -> pd.DataFrame:
+    """
+    Fill Sector (and add Name / SubIndustry) from a Symbol-indexed metadata
+    table in one vectorized lookup. Unknown symbols keep Sector "-".
+    """
+    stats = stats.copy()
+    symbols = stats["Symbol"]
+    if "Sector" in metadata:
+        stats["Sector"] = symbols.map(metadata["Sector"]).fillna("-")
+    for col in META_COLUMNS:
+        if col in metadata:
+            stats[col] = symbols.map(metadata[col]).fillna("")
+    return stats
+
+
+def sector_summary(stats: pd.DataFrame) -> pd.DataFrame:
+    """Per-sector count, average/median Change and average RSI of a stats frame."""
+    known = stats[stats["Sector"] != "-"]
+    return (
+        known.groupby("Sector")
+        .agg(Tickers=("Symbol", "size"), AvgChange=("Change", "mean"),
+             MedianChange=("Change", "median"), AvgRSI=("RSI", "mean"))
+        .sort_values("AvgChange")
+    )
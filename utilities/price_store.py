@@ -0,0 +1,304 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# ----------------------------------------------------------------------
+# On-disk OHLCV store. One Parquet file per symbol plus a small JSON
+# manifest that remembers which date range we already hold, so a warm
+# scan only asks yfinance for the missing tail.
+#
+# Yahoo's closes are split/dividend adjusted, so a split rewrites every
+# older bar. Tail requests therefore overlap the stored history by a few
+# days; if the re-downloaded (final) bars disagree with the stored ones,
+# the stored history is dropped and the symbol is downloaded in full.
+# A symbol last fetched before the latest session close is re-requested
+# however recently that was: its last bar was an intraday snapshot.
+# ----------------------------------------------------------------------
+DEFAULT_STORE_DIR = Path(
+    os.environ.get(
+        "LST_PRICE_STORE",
+        Path(__file__).resolve().parent.parent / ".cache" / "prices",
+    )
+)
+
+FIELDS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+OVERLAP = pd.Timedelta(days=7)  # stored days a tail request fetches again (a few final bars)
+RESTATED_RTOL = 1e-3  # relative Close difference that counts as re-adjusted history
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_CLOSE_HOUR = 16
+
+_PERIOD_OFFSETS = {
+    "d": lambda n: pd.DateOffset(days=n),
+    "wk": lambda n: pd.DateOffset(weeks=n),
+    "mo": lambda n: pd.DateOffset(months=n),
+    "y": lambda n: pd.DateOffset(years=n),
+}
+
+# one lock per symbol file, shared by every `PriceStore` of the process (each
+# `download_ticker_data` call, the warm-up thread and other sessions build
+# their own), so two writers never merge the same symbol at once
+_file_locks: Dict[Path, threading.Lock] = {}
+_file_locks_guard = threading.Lock()
+
+
+def _file_lock(path: Path) -> threading.Lock:
+    with _file_locks_guard:
+        return _file_locks.setdefault(path, threading.Lock())
+
+
+def latest_session_date(now: Optional[datetime] = None) -> pd.Timestamp:
+    """
+    Date of the most recent US session whose daily bar is final: today after
+    the 16:00 ET close, otherwise the previous weekday. (Exchange holidays are
+    not modelled; the TTL covers those.)
+    """
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    day = now.date()
+    if now.weekday() >= 5 or now.hour < MARKET_CLOSE_HOUR:
+        day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return pd.Timestamp(day)
+
+
+def session_close(session_date: pd.Timestamp) -> datetime:
+    """The 16:00 ET close of *session_date*: daily bars fetched before it were intraday snapshots."""
+    return datetime(session_date.year, session_date.month, session_date.day, MARKET_CLOSE_HOUR, tzinfo=MARKET_TZ)
+
+
+def period_start(period: str, now: Optional[pd.Timestamp] = None) -> Optional[pd.Timestamp]:
+    """
+    Translate a yfinance period string ("5d", "6mo", "1y", ...) into the first
+    calendar date it covers. Returns None for "max"-style periods we
+    cannot express as an offset.
+    """
+    now = (now or pd.Timestamp.now()).normalize()
+    if period == "ytd":
+        return pd.Timestamp(year=now.year, month=1, day=1)
+    for suffix, offset in _PERIOD_OFFSETS.items():
+        if period.endswith(suffix) and period[: -len(suffix)].isdigit():
+            return now - offset(int(period[: -len(suffix)]))
+    return None
+
+
+class PriceStore:
+    """
+    Persistent per-symbol price history.
+
+    Args:
+        root (str | Path): directory holding the Parquet files.
+        interval (str): bar size; each interval gets its own sub-folder.
+        refresh_after (pd.Timedelta): how long a symbol counts as up to date
+            after its last fetch (avoids hitting Yahoo on every rerun).
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR, interval: str = "1d",
+                 refresh_after: pd.Timedelta = pd.Timedelta(hours=1)):
+        self.root = Path(root) / interval
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.refresh_after = refresh_after
+        self._manifest_path = self.root / "manifest.json"
+        self._lock = threading.Lock()
+        self._manifest = self._read_manifest()
+
+    # ── manifest ──────────────────────────────────────────────────────────
+    def _read_manifest(self) -> Dict[str, dict]:
+        try:
+            return json.loads(self._manifest_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    @contextmanager
+    def _manifest_lock(self):
+        """
+        Cross-process lock (sharded scans write to one store from several
+        processes). An OS file lock: it waits for a live holder however long
+        it takes and is released by the OS if the holder dies, so there is
+        no stale lock to break. The lock file itself is never deleted.
+        """
+        with open(self.root / "manifest.lock", "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            else:
+                while True:
+                    try:
+                        f.seek(0)
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)  # gives up after ~10 s
+                        break
+                    except OSError:
+                        continue
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _write_manifest(self, changed: List[str], removed: List[str] = ()):
+        """Merge our entries for *changed* into the manifest on disk (other processes may have written too)."""
+        with self._manifest_lock():
+            merged = self._read_manifest()
+            merged.update({s: self._manifest[s] for s in changed if s in self._manifest})
+            for sym in removed:
+                merged.pop(sym, None)
+            self._manifest = merged
+            tmp = self._manifest_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(self._manifest, indent=1, sort_keys=True))
+            os.replace(tmp, self._manifest_path)
+
+    def _path(self, symbol: str) -> Path:
+        return self.root / f"{symbol}.parquet"
+
+    def coverage(self, symbol: str) -> Optional[tuple]:
+        """Return (first_date, last_date) stored for *symbol*, or None."""
+        entry = self._manifest.get(symbol)
+        if not entry or not self._path(symbol).exists():
+            return None
+        return pd.Timestamp(entry["start"]), pd.Timestamp(entry["end"])
+
+    # ── planning ──────────────────────────────────────────────────────────
+    def plan(self, symbols: List[str], period: str = "1y",
+             now: Optional[pd.Timestamp] = None) -> Dict[Optional[pd.Timestamp], List[str]]:
+        """
+        Group *symbols* by the date their download has to start from.
+
+        The key None means "no usable history, download the whole period";
+        a Timestamp key means "only the tail from this date on is missing".
+        Symbols fetched less than `refresh_after` ago are left out entirely,
+        unless that fetch was before the latest session close.
+        """
+        now = now or pd.Timestamp.now()
+        # manifest times are naive local time, like `now`
+        last_close = session_close(latest_session_date(now.to_pydatetime()))
+        wanted_start = period_start(period, now)
+        groups: Dict[Optional[pd.Timestamp], List[str]] = {}
+
+        for sym in symbols:
+            entry = self._manifest.get(sym)
+            cov = self.coverage(sym)
+            if cov is None or wanted_start is None:
+                groups.setdefault(None, []).append(sym)
+                continue
+
+            first, last = cov
+            # stored history does not reach back far enough → full download
+            # (allow a week of slack for weekends/holidays at the start)
+            if first > wanted_start + pd.Timedelta(days=7):
+                groups.setdefault(None, []).append(sym)
+                continue
+
+            fetched = pd.Timestamp(entry["fetched"])
+            if now - fetched < self.refresh_after and fetched.to_pydatetime().astimezone() >= last_close:
+                continue
+
+            # re-request the last stored days too: the last bar may have been
+            # partial, and the final ones before it reveal a re-adjustment
+            groups.setdefault(last - OVERLAP, []).append(sym)
+        return groups
+
+    @staticmethod
+    def _restated(old: pd.DataFrame, new: pd.DataFrame) -> bool:
+        """True if *new* disagrees with the final stored closes it overlaps (split, restatement)."""
+        final = old["Close"].iloc[:-1]  # the last stored bar may have been an intraday snapshot
+        overlap = final.index.intersection(new.index)
+        if overlap.empty:
+            return False
+        stored = final.loc[overlap].to_numpy(dtype=float)
+        fresh = new["Close"].loc[overlap].to_numpy(dtype=float)
+        ok = ~np.isnan(stored) & ~np.isnan(fresh)
+        return bool((np.abs(fresh[ok] - stored[ok]) > RESTATED_RTOL * np.abs(stored[ok])).any())
+
+    # ── read / write ──────────────────────────────────────────────────────
+    def write(self, data: pd.DataFrame, symbols: List[str],
+              now: Optional[pd.Timestamp] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Merge a freshly downloaded ticker-grouped frame (as returned by
+        `yf.download(group_by="ticker")`) into the store.
+
+        A symbol whose downloaded bars disagree with the stored closes they
+        overlap (see `_restated`) has its stored history dropped instead;
+        `coverage` is None for it afterwards, so it needs a full download.
+
+        Returns:
+            Dict[str, pd.DataFrame]: the stored (merged) history of every
+            symbol that got new bars, i.e. what `read` would return for it.
+        """
+        now = now or pd.Timestamp.now()
+        written = {}
+        with self._lock:
+            changed, removed = [], []
+            for sym in symbols:
+                if sym not in data.columns.get_level_values(0):
+                    continue
+                new = data[sym].dropna(how="all")
+                if new.empty:
+                    # nothing new (holiday, or Yahoo had no bar yet): still
+                    # remember that we asked so the next rerun does not
+                    if sym in self._manifest:
+                        self._manifest[sym]["fetched"] = now.isoformat()
+                        changed.append(sym)
+                    continue
+                new = new.reindex(columns=FIELDS)
+
+                path = self._path(sym)
+                with _file_lock(path):  # read-merge-write of one symbol
+                    if path.exists():
+                        old = pd.read_parquet(path)
+                        if self._restated(old, new):
+                            path.unlink()
+                            self._manifest.pop(sym, None)
+                            removed.append(sym)
+                            continue
+                        merged = pd.concat([old, new])
+                        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+                    else:
+                        merged = new.sort_index()
+                    merged.index.name = "Date"
+
+                    # a temp file of our own: other processes may write this symbol too
+                    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                    merged.to_parquet(tmp)
+                    os.replace(tmp, path)
+
+                self._manifest[sym] = {
+                    "start": merged.index[0].isoformat(),
+                    "end": merged.index[-1].isoformat(),
+                    "fetched": now.isoformat(),
+                }
+                changed.append(sym)
+                written[sym] = merged
+            self._write_manifest(changed, removed)
+        return written
+
+    def read(self, symbols: List[str], start: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Return stored history for *symbols* shaped like
+        `yf.download(group_by="ticker")` output, trimmed to *start*.
+        Symbols with nothing stored are left out.
+        """
+        parts = {}
+        for sym in symbols:
+            path = self._path(sym)
+            if not path.exists():
+                continue
+            df = pd.read_parquet(path)
+            parts[sym] = df.loc[start:] if start is not None else df
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat(parts, axis=1, names=["Ticker", "Price"], sort=True)
@@ -0,0 +1,210 @@
+import logging
+import os
+import random
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from utilities.price_store import period_start
+logger = logging.getLogger(__name__)
+
+# ----------------------------------------------------------------------
+# Market-data providers. `download_ticker_data` only talks to the
+# interface below, so the pages never import a data vendor directly.
+# Every provider returns a ticker-grouped frame: columns are
+# (symbol, field) with fields Open/High/Low/Close/Adj Close/Volume.
+# ----------------------------------------------------------------------
+FIELDS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+
+class MarketDataProvider:
+    """Base class for price-history backends."""
+
+    name = "base"
+
+    def fetch(self, chunk: List[str], period: str = "1y", start=None, interval: str = "1d",
+              timeout: float = 3) -> pd.DataFrame:
+        """Return history for the symbols in *chunk* (symbols without data are left out)."""
+        raise NotImplementedError
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Yahoo Finance through yfinance (the default backend)."""
+
+    name = "yfinance"
+
+    def fetch(self, chunk, period="1y", start=None, interval="1d", timeout=3):
+        """
+        `yf.download` keeps its results in module-level dicts (yfinance 0.2.x),
+        so two chunks downloading at once would overwrite each other. We use
+        one `Ticker.history` call per symbol instead (which is what
+        `yf.download` does internally) and assemble the same layout.
+
+        A symbol whose request raises (delisted, bad ticker, a timeout) is
+        left out like an empty one, so the missing-symbol pass retries only
+        that symbol; the chunk only raises when every symbol failed (e.g.
+        no network), which the scheduler's chunk retries handle.
+        """
+        parts, errors = {}, []
+        for sym in chunk:
+            try:
+                hist = yf.Ticker(sym).history(
+                    period=None if start is not None else period,
+                    start=start,
+                    interval=interval,
+                    auto_adjust=False,
+                    actions=False,
+                    timeout=timeout,
+                )
+            except Exception as e:
+                logger.debug("history request for %s failed: %s", sym, e)
+                errors.append(e)
+                continue
+            if hist.empty:
+                continue
+            if interval[-1] not in ("m", "h"):
+                hist.index = hist.index.tz_localize(None)  # same as yf.download for daily bars
+            parts[sym] = hist
+        if chunk and len(errors) == len(chunk):
+            raise errors[-1]
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat(parts, axis=1, names=["Ticker", "Price"], sort=True)
+
+
+def synthetic_history(symbols: List[str], n_days: int = 260, end=None, seed: int = 0,
+                      freq: str = "B") -> pd.DataFrame:
+    """
+    Deterministic random-walk OHLCV for *symbols*, shaped like
+    `yf.download(group_by="ticker")` output. The same (symbol, seed) always
+    yields the same series.
+    """
+    end = pd.Timestamp(end or pd.Timestamp.now()).normalize()
+    index = pd.date_range(end=end, periods=n_days, freq=freq, name="Date")
+    parts = {}
+    for sym in symbols:
+        rng = np.random.default_rng([seed, zlib.crc32(sym.encode())])
+        close = rng.uniform(10, 500) * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))
+        spread = np.abs(rng.normal(0, 0.01, n_days))
+        parts[sym] = pd.DataFrame({
+            "Open": close * (1 + rng.normal(0, 0.005, n_days)),
+            "High": close * (1 + spread),
+            "Low": close * (1 - spread),
+            "Close": close,
+            "Adj Close": close,
+            "Volume": rng.integers(10_000, 10_000_000, n_days).astype(float),
+        }, index=index)
+    return pd.concat(parts, axis=1, names=["Ticker", "Price"])
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Replays recorded or synthetic OHLCV from local files, for load tests and
+    profiling without network access.
+
+    Args:
+        root (str | Path): folder with one `<SYMBOL>.parquet` or `<SYMBOL>.csv`
+            per symbol (a `PriceStore` folder works as-is). None → synthetic only.
+        data (pd.DataFrame): in-memory ticker-grouped frame to replay; checked
+            before *root*.
+        synthetic (bool): generate a deterministic random walk for symbols
+            without a file instead of leaving them out.
+        latency (float): seconds each `fetch` call sleeps (simulated round trip).
+        jitter (float): extra uniform random latency in [0, jitter] seconds.
+        failure_rate (float): probability a `fetch` call raises ConnectionError.
+        missing_rate (float): probability a single symbol comes back empty.
+        seed (int): seed for latency, failure and synthetic-data draws.
+    """
+
+    name = "replay"
+
+    def __init__(self, root=None, data: Optional[pd.DataFrame] = None, synthetic: bool = True,
+                 latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0, missing_rate: float = 0.0, seed: int = 0,
+                 end=None):
+        self.root = Path(root) if root is not None else None
+        self.data = data
+        # membership test per symbol; scanning the column level each time is O(N) per symbol
+        self._data_symbols = set(data.columns.get_level_values(0)) if data is not None else set()
+        self.synthetic = synthetic
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.missing_rate = missing_rate
+        self.seed = seed
+        self.end = end
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()  # fetch is called from several threads
+
+    def _load(self, sym: str) -> Optional[pd.DataFrame]:
+        if sym in self._data_symbols:
+            return self.data[sym]
+        if self.root is not None:
+            for path in (self.root / f"{sym}.parquet", self.root / f"{sym}.csv"):
+                if path.exists():
+                    if path.suffix == ".csv":
+                        return pd.read_csv(path, index_col=0, parse_dates=True)
+                    return pd.read_parquet(path)
+        if self.synthetic:
+            # a year and a half of bars so every supported period is covered
+            return synthetic_history([sym], n_days=400, end=self.end, seed=self.seed)[sym]
+        return None
+
+    def fetch(self, chunk, period="1y", start=None, interval="1d", timeout=3):
+        with self._lock:
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            fail = self._rng.random() < self.failure_rate
+            dropped = {s for s in chunk if self._rng.random() < self.missing_rate}
+        time.sleep(delay)
+        if fail:
+            raise ConnectionError("replay provider: injected failure")
+
+        parts = {}
+        for sym in chunk:
+            df = None if sym in dropped else self._load(sym)
+            if df is None or df.empty:
+                continue
+            df = df.reindex(columns=FIELDS).sort_index()
+            first = pd.Timestamp(start) if start is not None else period_start(period, now=df.index[-1])
+            parts[sym] = df.loc[first:] if first is not None else df
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat(parts, axis=1, names=["Ticker", "Price"], sort=True)
+
+
+_PROVIDER: Optional[MarketDataProvider] = None
+
+
+def get_provider() -> MarketDataProvider:
+    """
+    Return the process-wide provider, picked with the LST_DATA_PROVIDER
+    environment variable ("yfinance" by default, or "replay"). The replay
+    backend reads LST_REPLAY_DIR, LST_REPLAY_LATENCY, LST_REPLAY_FAILURE_RATE
+    and LST_REPLAY_MISSING_RATE.
+    """
+    global _PROVIDER
+    if _PROVIDER is None:
+        kind = os.environ.get("LST_DATA_PROVIDER", "yfinance").lower()
+        if kind == "replay":
+            _PROVIDER = ReplayProvider(
+                root=os.environ.get("LST_REPLAY_DIR"),
+                latency=float(os.environ.get("LST_REPLAY_LATENCY", 0)),
+                failure_rate=float(os.environ.get("LST_REPLAY_FAILURE_RATE", 0)),
+                missing_rate=float(os.environ.get("LST_REPLAY_MISSING_RATE", 0)),
+            )
+        elif kind == "yfinance":
+            _PROVIDER = YFinanceProvider()
+        else:
+            raise ValueError(f"Unknown LST_DATA_PROVIDER {kind!r} (expected 'yfinance' or 'replay')")
+    return _PROVIDER
+
+
+def set_provider(provider: MarketDataProvider):
+    """Swap the process-wide provider (tests, benchmarks, headless runs)."""
+    global _PROVIDER
+    _PROVIDER = provider
@@ -0,0 +1,157 @@
+import os
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Hashable, Optional
+
+import pandas as pd
+import streamlit as st
+
+from utilities.metrics import WindowStats
+from utilities.price_store import DEFAULT_STORE_DIR, MARKET_TZ, latest_session_date
+from utilities.telemetry import inc
+
+# ----------------------------------------------------------------------
+# Process-wide cache of computed scan results, shared by every Streamlit
+# session in this server process. Entries are keyed by
+# (universe, trading date) and hold the stats for every look-back window
+# (`WindowStats`): once a new session closes the trading date changes, so
+# yesterday's entries are never hit again and get evicted.
+# ----------------------------------------------------------------------
+STATS_DIR = DEFAULT_STORE_DIR.parent / "stats"  # stats published for other processes
+MARKET_OPEN = (9, 30)  # ET
+
+
+class ScanCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL.
+
+    Args:
+        max_entries (int): entries kept before the least recently used is dropped.
+        ttl (float): seconds an entry stays valid.
+    """
+
+    def __init__(self, max_entries: int = 64, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self._data.pop(key, None)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any, age: float = 0.0):
+        """Store *value*; *age* is how many seconds of its TTL it has already used."""
+        with self._lock:
+            self._data[key] = (time.monotonic() - age, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, predicate=None):
+        """Drop every entry (or only those whose key satisfies *predicate*)."""
+        with self._lock:
+            for key in [k for k in self._data if predicate is None or predicate(k)]:
+                del self._data[key]
+
+    def __len__(self):
+        return len(self._data)
+
+
+@st.cache_resource
+def get_scan_cache() -> ScanCache:
+    """The single `ScanCache` shared by all sessions of this server process."""
+    return ScanCache()
+
+
+def scan_key(universe: str, session_date: Optional[pd.Timestamp] = None) -> tuple:
+    """Cache key for the stats of *universe* as of *session_date* (default: latest)."""
+    return (universe, session_date or latest_session_date())
+
+
+def _stats_path(universe: str) -> Path:
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", universe).strip("_")
+    return STATS_DIR / f"{slug}.pkl"
+
+
+def next_open(session_date: pd.Timestamp) -> datetime:
+    """The 09:30 ET open of the first weekday after *session_date*."""
+    day = session_date + timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return datetime(day.year, day.month, day.day, *MARKET_OPEN, tzinfo=MARKET_TZ)
+
+
+def _read_published(universe: str, session_date: pd.Timestamp, ttl: float) -> Optional[tuple]:
+    """
+    (stats, age in seconds) another process (e.g. the warm-up worker) wrote
+    for *session_date*, or None if there are none or they are out of date.
+
+    Stats published before the next session opened hold that session's
+    final bars and stay valid until the session date changes (age 0);
+    stats published while a session was trading include its moving
+    intraday bar and are dropped after *ttl*.
+    """
+    try:
+        published = pd.read_pickle(_stats_path(universe))
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+    if published["session_date"] != session_date:
+        return None
+    if published["published"] < next_open(session_date).timestamp():
+        return published["stats"], 0.0
+    age = time.time() - published["published"]
+    return (published["stats"], age) if age <= ttl else None
+
+
+def get_cached_stats(universe: str) -> Optional[WindowStats]:
+    """
+    Stats for every look-back window computed for the latest session date,
+    by any session of this process or published to disk by the warm-up
+    worker, or None.
+    """
+    cache = get_scan_cache()
+    key = scan_key(universe)
+    stats = cache.get(key)
+    result = "memory"
+    if stats is None:
+        published = _read_published(universe, key[1], cache.ttl)
+        result = "disk" if published is not None else "miss"
+        if published is not None:
+            stats, age = published
+            cache.put(key, stats, age=age)  # intraday stats expire when the file's TTL runs out
+    inc("lst_scan_cache_requests_total", result=result)
+    return stats
+
+
+def put_cached_stats(universe: str, stats: WindowStats, persist: bool = True):
+    """
+    Publish *stats* for everyone and drop entries of older session dates
+    (a new bar has arrived, they can never be hit again). With *persist*
+    the stats are also written to disk for other processes and restarts.
+    """
+    cache = get_scan_cache()
+    key = scan_key(universe)
+    cache.invalidate(lambda k: k[0] == universe and k[1] < key[1])
+    cache.put(key, stats)
+
+    if persist:
+        path = _stats_path(universe)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        pd.to_pickle({"session_date": key[1], "stats": stats, "published": time.time()}, tmp)
+        os.replace(tmp, path)
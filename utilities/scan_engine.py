@@ -0,0 +1,328 @@
+# scan_engine.py - the losers/gainers scan without Streamlit widgets
+#
+#   python -m utilities.scan_engine scan --universe sp500 --days 30
+#   python -m utilities.scan_engine scan --universe russell2000 --days 10 --format json -o r2k.json
+#
+# `run_scan` is what the Scanner page calls; here it is usable from cron,
+# benchmarks and notebooks. Progress goes through a callback, results are
+# written as Parquet or JSON.
+import argparse
+import heapq
+import itertools
+import json
+import logging
+import random
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import pandas as pd
+
+from american import UNIVERSES, load_metadata
+from utilities.compact import CompactHistory
+from utilities.metrics import ALL_INDICATORS, STATS_COLUMNS, WindowStats, compute_window_stats
+from utilities.price_store import DEFAULT_STORE_DIR, latest_session_date
+from utilities.scan_cache import get_cached_stats, put_cached_stats
+from utilities.screener import run_screen, screen_stats
+from utilities.sharded_scan import SHARD_THRESHOLD, sharded_window_stats
+from utilities.ticker_info import download_ticker_data
+
+logger = logging.getLogger(__name__)
+
+# short names for the command line → universe labels used by the pages
+UNIVERSE_ALIASES = {
+    "sp500": "Large (S&P 500)",
+    "sp400": "Mid (S&P 400)",
+    "sp600": "Small (S&P 600)",
+    "russell1000": "Russell 1000",
+    "russell2000": "Russell 2000",
+    "us": "Total US market",
+}
+DEFAULT_OUTPUT_DIR = DEFAULT_STORE_DIR.parent / "scans"
+LOOKUP_WORKERS = 8  # parallel requests when `symbol_stats` downloads a few symbols
+
+ProgressCb = Callable[[int, int, object], None]  # (done, total, ChunkReport or text)
+PartialCb = Callable[[WindowStats, int, int], None]  # (stats of one chunk, symbols done, total)
+
+
+@dataclass
+class ScanResult:
+    """Stats of one scan plus how they were obtained."""
+    universe: str
+    symbols: List[str]
+    universe_size: int
+    stats: WindowStats
+    source: str = "download"  # "cache", "download" or "sharded"
+    created: datetime = field(default_factory=datetime.now)
+
+    @property
+    def full(self) -> bool:
+        return len(self.symbols) == self.universe_size
+
+    def table(self, days: int) -> pd.DataFrame:
+        """Per-symbol stats for a look-back of *days* (see `WindowStats.for_window`)."""
+        return self.stats.for_window(days)
+
+    def movers(self, days: int, k: int = 20) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """(losers, gainers): the k biggest falls and rises over *days*."""
+        return top_movers(self.table(days), k)
+
+    def screen(self, days: int, query: str) -> pd.DataFrame:
+        """Rows of the *days* table matching a screen expression (see `utilities.screener`)."""
+        return screen_stats(self.stats, days, query)
+
+
+def top_movers(stats: pd.DataFrame, k: int = 20) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """The k most negative and k most positive `Change` rows of a stats table."""
+    if stats.empty:
+        return stats, stats
+    losers = run_screen(stats, f"Change < 0 sort by Change asc limit {k}")
+    gainers = run_screen(stats, f"Change > 0 sort by Change desc limit {k}")
+    return losers, gainers
+
+
+class RunningMovers:
+    """
+    Top-k losers and gainers of one look-back, updated part by part (a
+    download chunk or a shard) while a scan runs. Each part is first cut
+    to its own top-k, so merging it is at most 2k heap operations; once
+    every part is in, the result equals `top_movers` of the whole table.
+
+    Args:
+        days (int): look-back window.
+        k (int): basket size.
+    """
+
+    def __init__(self, days: int, k: int = 20):
+        self.days = days
+        self.k = k
+        self.symbols = 0  # symbols merged so far
+        # min-heaps on the distance from the extreme: the root is the weakest row kept
+        self._losers: list = []
+        self._gainers: list = []
+        self._seq = itertools.count()  # tie-break, rows themselves don't compare
+
+    def add(self, stats: WindowStats):
+        self.symbols += len(stats.base)
+        losers, gainers = top_movers(stats.for_window(self.days), self.k)
+        for heap, rows, sign in ((self._losers, losers, -1), (self._gainers, gainers, 1)):
+            for row in rows.to_dict("records"):
+                item = (sign * row["Change"], next(self._seq), row)
+                if len(heap) < self.k:
+                    heapq.heappush(heap, item)
+                elif item[0] > heap[0][0]:
+                    heapq.heapreplace(heap, item)
+
+    def movers(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """(losers, gainers) so far, most extreme first."""
+        losers = pd.DataFrame([row for _, _, row in sorted(self._losers, reverse=True)])
+        gainers = pd.DataFrame([row for _, _, row in sorted(self._gainers, reverse=True)])
+        return losers, gainers
+
+
+def resolve_universe(name: str) -> str:
+    """Accept a page label ("Large (S&P 500)") or a CLI alias ("sp500")."""
+    if name in UNIVERSES:
+        return name
+    try:
+        return UNIVERSE_ALIASES[name.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown universe {name!r}; use one of {sorted(UNIVERSE_ALIASES)}") from None
+
+
+def run_scan(universe: str, max_scan: Optional[int] = None, seed: Optional[int] = None,
+             use_cache: bool = True, publish: bool = True,
+             progress_cb: Optional[ProgressCb] = None,
+             partial_cb: Optional[PartialCb] = None) -> ScanResult:
+    """
+    Scan *universe*: per-window stats and every registered indicator (the
+    screener and the indicator table run on them) for every symbol (or a
+    random sample).
+
+    Args:
+        universe (str): universe label or alias (see `UNIVERSE_ALIASES`).
+        max_scan (int): scan a random sample of this many symbols if the
+            universe is larger (None → the whole universe).
+        seed (int): seed of that sample.
+        use_cache (bool): answer from stats already computed for the latest
+            session (by a page, the warm-up or an earlier run).
+        publish (bool): share a full scan through `put_cached_stats`.
+        progress_cb (callable): progress_cb(done, total, report) during downloads.
+        partial_cb (callable): partial_cb(stats, done, total) with the stats of
+            every chunk (or shard) as soon as it is downloaded, `done` being the
+            symbols scanned so far (e.g. to feed a `RunningMovers`). With it,
+            the stats are computed chunk by chunk and stacked at the end,
+            which gives the same result as one pass over everything.
+
+    Returns:
+        ScanResult
+    """
+    label = resolve_universe(universe)
+    symbols = UNIVERSES[label]()
+    universe_size = len(symbols)
+    if max_scan is not None and max_scan < universe_size:
+        symbols = random.Random(seed).sample(symbols, max_scan)
+    full = len(symbols) == universe_size
+
+    cached = get_cached_stats(label) if use_cache else None
+    if cached is not None:
+        return ScanResult(label, symbols, universe_size, cached.select(symbols), "cache")
+
+    metadata = load_metadata(label)
+    parts: List[WindowStats] = []
+
+    def _add_part(part: WindowStats):
+        parts.append(part)
+        partial_cb(part, sum(len(p.base) for p in parts), len(symbols))
+
+    if len(symbols) > SHARD_THRESHOLD:
+        stats = sharded_window_stats(
+            symbols, metadata=metadata,
+            progress_cb=None if progress_cb is None else (lambda d, t: progress_cb(d, t, f"shard {d}/{t}")),
+            partial_cb=None if partial_cb is None else _add_part, indicators=ALL_INDICATORS,
+        )
+        source = "sharded"
+    elif partial_cb is not None:
+        # stats per chunk as it arrives; every symbol's stats only depend on its own history
+        download_ticker_data(
+            symbols=symbols, progress_cb=progress_cb,
+            chunk_cb=lambda frame: _add_part(compute_window_stats(
+                CompactHistory.from_frame(frame), list(frame.columns.get_level_values(0).unique()),
+                metadata=metadata, indicators=ALL_INDICATORS)),
+        )
+        stats = WindowStats.concat(parts).select(symbols) if parts else \
+            compute_window_stats(CompactHistory.empty(), [], metadata=metadata, indicators=ALL_INDICATORS)
+        source = "download"
+    else:
+        frames = download_ticker_data(symbols=symbols, progress_cb=progress_cb)
+        # keep only Close/High/Low/Volume of all chunks (float32 / int64 arrays)
+        stats = compute_window_stats(CompactHistory.from_frames(frames), symbols, metadata=metadata,
+                                     indicators=ALL_INDICATORS)
+        source = "download"
+
+    # only full scans are shared, a sample would hide the real extremes
+    if publish and full and not stats.base.empty:
+        put_cached_stats(label, stats)
+    return ScanResult(label, symbols, universe_size, stats, source)
+
+
+def symbol_stats(universe: str, symbols: List[str], days: int = 30,
+                 progress_cb: Optional[ProgressCb] = None) -> pd.DataFrame:
+    """
+    Stats of a few *symbols* of *universe* without scanning it: taken from
+    the universe's cached scan when there is one, otherwise downloaded
+    together (through the price store, spread over `LOOKUP_WORKERS`
+    parallel chunks) and computed for those symbols only.
+
+    Args:
+        universe (str): universe label or alias (for the cache and metadata).
+        symbols (List[str]): the symbols, e.g. typed by the user.
+        days (int): look-back window.
+        progress_cb (callable): progress_cb(done, total, report) during the download.
+
+    Returns:
+        pd.DataFrame: the `for_window(days)` rows of the symbols that have
+        enough history, in the order of *symbols*.
+    """
+    label = resolve_universe(universe)
+    symbols = list(dict.fromkeys(symbols))
+    parts = []
+    missing = symbols
+    cached = get_cached_stats(label)
+    if cached is not None:
+        parts.append(cached.select(symbols))
+        held = set(cached.base["Symbol"])
+        missing = [s for s in symbols if s not in held]
+    if missing:
+        # providers fetch a chunk's symbols one after another: small chunks let the pool run them in parallel
+        chunk_size = -(-len(missing) // LOOKUP_WORKERS)
+        frames = download_ticker_data(symbols=missing, chunk_size=chunk_size, max_workers=LOOKUP_WORKERS,
+                                      progress_cb=progress_cb)
+        # same columns as the cached scan rows (cheap for a few symbols)
+        parts.append(compute_window_stats(CompactHistory.from_frames(frames), missing, [days],
+                                          metadata=load_metadata(label), indicators=ALL_INDICATORS))
+    if not parts:
+        return pd.DataFrame(columns=STATS_COLUMNS)
+    tables = [p.for_window(days) for p in parts]
+    table = pd.concat(tables, ignore_index=True) if len(tables) > 1 else tables[0]
+    order = {s: i for i, s in enumerate(symbols)}
+    return table.sort_values("Symbol", key=lambda s: s.map(order), ignore_index=True)
+
+
+def write_result(result: ScanResult, days: int, path: Path, fmt: str = "parquet", k: int = 20) -> Path:
+    """
+    Write the per-symbol table for *days* to *path*: Parquet (the whole
+    table, sorted by Change) or JSON (metadata, top-k losers/gainers and
+    the whole table).
+    """
+    table = result.table(days).sort_values("Change", ignore_index=True)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "parquet":
+        table.to_parquet(path, index=False)
+    elif fmt == "json":
+        losers, gainers = top_movers(table, k)
+        payload = {
+            "universe": result.universe,
+            "days": days,
+            "session_date": latest_session_date().date().isoformat(),
+            "created": result.created.isoformat(timespec="seconds"),
+            "scanned": len(result.symbols),
+            "universe_size": result.universe_size,
+            "source": result.source,
+            "losers": json.loads(losers.to_json(orient="records")),
+            "gainers": json.loads(gainers.to_json(orient="records")),
+            "stats": json.loads(table.to_json(orient="records")),
+        }
+        path.write_text(json.dumps(payload, indent=1))
+    else:
+        raise ValueError(f"Unknown format {fmt!r} (expected 'parquet' or 'json')")
+    return path
+
+
+def _print_progress(done, total, report):
+    if hasattr(report, "seconds"):
+        report = f"{report.symbols} symbols in {report.seconds:0.1f}s"
+    print(f"\r  {done}/{total} {report or ''}".ljust(60), end="\n" if done == total else "", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless losers/gainers scans.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    scan = sub.add_parser("scan", help="scan a universe and write the result")
+    scan.add_argument("--universe", required=True, help=f"one of {', '.join(UNIVERSE_ALIASES)}")
+    scan.add_argument("--days", type=int, default=30, help="look-back window in days (5-90)")
+    scan.add_argument("--top", type=int, default=20, help="losers/gainers to print")
+    scan.add_argument("--max-scan", type=int, default=None, help="random sample of this many symbols")
+    scan.add_argument("--seed", type=int, default=None)
+    scan.add_argument("--format", choices=["parquet", "json"], default="parquet")
+    scan.add_argument("-o", "--output", type=Path, default=None,
+                      help=f"output file (default: {DEFAULT_OUTPUT_DIR}/<universe>_<days>d_<date>.<format>)")
+    scan.add_argument("--no-cache", action="store_true", help="recompute even if today's stats exist")
+    scan.add_argument("--screen", default=None,
+                      help='also print a screen, e.g. "RSI < 30 and AvgVol > 1M sort by Change asc limit 20"')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(name)s %(message)s")
+
+    result = run_scan(args.universe, max_scan=args.max_scan, seed=args.seed,
+                      use_cache=not args.no_cache, progress_cb=_print_progress)
+    alias = next((a for a, label in UNIVERSE_ALIASES.items() if label == result.universe), args.universe)
+    output = args.output or DEFAULT_OUTPUT_DIR / (
+        f"{alias}_{args.days}d_{latest_session_date().date().isoformat()}.{args.format}"
+    )
+    write_result(result, args.days, output, args.format, args.top)
+
+    losers, gainers = result.movers(args.days, args.top)
+    columns = ["Symbol", "Sector", "Change", "Today", "Ago", "RSI"]
+    print(f"{result.universe}: {len(result.symbols)}/{result.universe_size} symbols ({result.source})")
+    print(f"\nTop-{args.top} losers, last {args.days} days\n{losers[columns].to_string(index=False)}")
+    print(f"\nTop-{args.top} gainers, last {args.days} days\n{gainers[columns].to_string(index=False)}")
+    if args.screen:
+        screened = result.screen(args.days, args.screen)
+        print(f"\nScreen: {args.screen} ({len(screened)} rows)\n{screened[columns].to_string(index=False)}")
+    print(f"\nsaved {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utilities.metrics import WindowStats
+from utilities.scan_cache import ScanCache
+from utilities.telemetry import inc, span
+
+# ----------------------------------------------------------------------
+# Screener: filter / sort / limit expressions over a stats table, e.g.
+#
+#   RSI < 30 and AvgVol > 1M sort by Change asc limit 20
+#   Sector == "Energy" and (Change > 5 or Today > Ago) sort by RSI desc
+#   SMACross > 0 and SMACross <= 5 limit 50
+#
+# An expression is parsed once into a tree of closures (no `eval`), the
+# filter runs as one boolean mask over the column arrays and the top-k
+# rows are picked with `argpartition`, so only the k survivors get sorted.
+# Results are cached per (data version, look-back, expression).
+# ----------------------------------------------------------------------
+_NUMBER = r"(?:\d+(?:\.\d*)?|\.\d+)(?:e[+-]?\d+)?[kmb]?(?![\w.])"
+_TOKEN = re.compile(
+    rf"\s*(?:(?P<num>{_NUMBER})|(?P<str>\"[^\"]*\"|'[^']*')"
+    r"|(?P<op><=|>=|==|!=|<|>|=|\(|\)|,|-)|(?P<name>[A-Za-z_][\w%]*))",
+    re.IGNORECASE,
+)
+_SUFFIX = {"k": 1e3, "m": 1e6, "b": 1e9}
+_COMPARE = {
+    "<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal,
+    "==": np.equal, "=": np.equal, "!=": np.not_equal,
+}
+_KEYWORDS = {"and", "or", "not", "in", "sort", "by", "asc", "desc", "limit"}
+_KIND_NAMES = {"num": "a number", "name": "a column name", "str": "a quoted text", "op": "an operator"}
+
+Columns = Callable[[str], np.ndarray]  # column name → values of the table
+Mask = Callable[[Columns], np.ndarray]
+
+
+class ScreenError(ValueError):
+    """A screen expression that cannot be parsed or refers to unknown columns."""
+
+
+@dataclass(frozen=True)
+class Screen:
+    """
+    A parsed screen expression.
+
+    Attributes:
+        text (str): the expression as written.
+        where (callable): where(columns) → boolean mask (None: every row).
+        sort (str): column to rank by (None: keep the table order).
+        ascending (bool): sort direction.
+        limit (int): rows to keep (None: all).
+    """
+    text: str
+    where: Optional[Mask]
+    sort: Optional[str]
+    ascending: bool
+    limit: Optional[int]
+
+
+def _tokenize(text: str) -> List[tuple]:
+    tokens, pos = [], 0
+    text = text.strip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if m is None or m.end() == pos:
+            raise ScreenError(f"Unexpected {text[pos:].strip()[:15]!r} at position {pos}")
+        kind = m.lastgroup
+        value = m.group(kind)
+        if kind == "name" and value.lower() in _KEYWORDS:
+            kind, value = "kw", value.lower()
+        tokens.append((kind, value))
+        pos = m.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent over: or-expr [sort by NAME [asc|desc]] [limit N]."""
+
+    def __init__(self, text: str):
+        self.tokens = _tokenize(text)
+        self.i = 0
+
+    def peek(self, kind=None, value=None) -> bool:
+        if self.i >= len(self.tokens):
+            return False
+        k, v = self.tokens[self.i]
+        return (kind is None or k == kind) and (value is None or v == value)
+
+    def take(self, kind=None, value=None) -> str:
+        if not self.peek(kind, value):
+            found = self.tokens[self.i][1] if self.i < len(self.tokens) else "end of expression"
+            raise ScreenError(f"Expected {value or _KIND_NAMES.get(kind, kind)}, found {found!r}")
+        self.i += 1
+        return self.tokens[self.i - 1][1]
+
+    def parse(self, text: str) -> Screen:
+        where = None
+        if not (self.peek("kw", "sort") or self.peek("kw", "limit") or not self.tokens):
+            where = self.or_expr()
+        sort, ascending, limit = None, True, None
+        if self.peek("kw", "sort"):
+            self.take("kw", "sort")
+            self.take("kw", "by")
+            sort = self.take("name")
+            if self.peek("kw", "asc") or self.peek("kw", "desc"):
+                ascending = self.take("kw") == "asc"
+        if self.peek("kw", "limit"):
+            self.take("kw", "limit")
+            limit = int(self.number())
+            if limit < 0:
+                raise ScreenError("limit must be positive")
+        if self.i < len(self.tokens):
+            raise ScreenError(f"Unexpected {self.tokens[self.i][1]!r}")
+        return Screen(text, where, sort, ascending, limit)
+
+    # ── boolean structure ─────────────────────────────────────────────────
+    def or_expr(self) -> Mask:
+        parts = [self.and_expr()]
+        while self.peek("kw", "or"):
+            self.take()
+            parts.append(self.and_expr())
+        return parts[0] if len(parts) == 1 else (lambda cols: np.logical_or.reduce([p(cols) for p in parts]))
+
+    def and_expr(self) -> Mask:
+        parts = [self.not_expr()]
+        while self.peek("kw", "and"):
+            self.take()
+            parts.append(self.not_expr())
+        return parts[0] if len(parts) == 1 else (lambda cols: np.logical_and.reduce([p(cols) for p in parts]))
+
+    def not_expr(self) -> Mask:
+        if self.peek("kw", "not"):
+            self.take()
+            inner = self.not_expr()
+            return lambda cols: ~inner(cols)
+        if self.peek("op", "("):
+            self.take()
+            inner = self.or_expr()
+            self.take("op", ")")
+            return inner
+        return self.comparison()
+
+    # ── comparisons ───────────────────────────────────────────────────────
+    def comparison(self) -> Mask:
+        left = self.operand()
+        if self.peek("kw", "in"):
+            self.take()
+            self.take("op", "(")
+            options = [self.literal()]
+            while self.peek("op", ","):
+                self.take()
+                options.append(self.literal())
+            self.take("op", ")")
+            return lambda cols: np.isin(left(cols), options)
+        op = self.take("op")
+        if op not in _COMPARE:
+            raise ScreenError(f"Expected a comparison (<, <=, >, >=, ==, !=), found {op!r}")
+        right = self.operand()
+        compare = _COMPARE[op]
+
+        def mask(cols):
+            a, b = left(cols), right(cols)
+            try:
+                with np.errstate(invalid="ignore"):
+                    return np.asarray(compare(a, b), dtype=bool)  # NaN compares False
+            except TypeError:
+                raise ScreenError(f"Cannot compare {a.dtype if hasattr(a, 'dtype') else type(a).__name__} "
+                                  f"with {b.dtype if hasattr(b, 'dtype') else type(b).__name__} ({op})") from None
+        return mask
+
+    def operand(self):
+        if self.peek("name"):
+            name = self.take()
+            return lambda cols: cols(name)
+        value = self.literal()
+        return lambda cols: value
+
+    def literal(self):
+        if self.peek("str"):
+            return self.take()[1:-1]
+        return self.number()
+
+    def number(self) -> float:
+        sign = 1
+        if self.peek("op", "-"):
+            self.take()
+            sign = -1
+        token = self.take("num").lower()
+        scale = _SUFFIX.get(token[-1], 1)
+        return sign * float(token.rstrip("kmb")) * scale
+
+
+@lru_cache(maxsize=512)
+def parse_screen(text: str) -> Screen:
+    """Parse a screen expression (memoized: the same text is parsed once)."""
+    return _Parser(text).parse(text)
+
+
+def _column_lookup(table: pd.DataFrame) -> Columns:
+    """Case-insensitive column access with the arrays pulled out once per run."""
+    names = {c.lower(): c for c in table.columns}
+    arrays: Dict[str, np.ndarray] = {}
+
+    def cols(name: str) -> np.ndarray:
+        actual = names.get(name.lower())
+        if actual is None:
+            raise ScreenError(f"Unknown column {name!r}; available: {', '.join(table.columns)}")
+        if actual not in arrays:
+            values = table[actual].to_numpy()
+            arrays[actual] = values.astype(float) if values.dtype.kind in "iufb" else values.astype(str)
+        return arrays[actual]
+    return cols
+
+
+def run_screen(table: pd.DataFrame, screen) -> pd.DataFrame:
+    """
+    Apply *screen* (a `Screen` or an expression) to a stats table.
+
+    The filter is one vectorized mask; with a sort and a limit only the
+    `limit` best rows are selected (`argpartition`) and then ordered.
+    Rows with NaN in the sort column are left out.
+
+    Returns:
+        pd.DataFrame: the matching rows, in screen order.
+    """
+    screen = parse_screen(screen) if isinstance(screen, str) else screen
+    if table.empty:
+        return table
+    cols = _column_lookup(table)
+    mask = np.ones(len(table), dtype=bool) if screen.where is None else np.asarray(screen.where(cols), dtype=bool)
+    if mask.shape != (len(table),):  # e.g. "1 < 2": no column involved
+        mask = np.broadcast_to(mask, (len(table),)).copy()
+
+    if screen.sort is None:
+        rows = np.flatnonzero(mask)[:screen.limit]
+    else:
+        key = cols(screen.sort)
+        if key.dtype.kind != "f":
+            raise ScreenError(f"Can only sort by a numeric column, not {screen.sort!r}")
+        key = key if screen.ascending else -key
+        rows = np.flatnonzero(mask & ~np.isnan(key))
+        k = len(rows) if screen.limit is None else min(screen.limit, len(rows))
+        if 0 < k < len(rows):
+            rows = rows[np.argpartition(key[rows], k - 1)[:k]]
+        rows = rows[np.argsort(key[rows], kind="stable")][:k]
+    return table.iloc[rows].reset_index(drop=True)
+
+
+# ── cached screens over a scan ──────────────────────────────────────────────
+@st.cache_resource
+def get_screen_cache() -> ScanCache:
+    """Screen results (and look-back tables) shared by all sessions of this process."""
+    return ScanCache(max_entries=1024, ttl=3600)
+
+
+def screen_stats(stats: WindowStats, days: int, text: str) -> pd.DataFrame:
+    """
+    Run the screen *text* on the look-back table `stats.for_window(days)`.
+
+    Results are cached per (stats.version, days, expression), so the same
+    screen on the same data is a lookup; a new scan gets a new version.
+
+    Raises:
+        ScreenError: the expression is invalid for this table.
+    """
+    screen = parse_screen(" ".join(text.split()))
+    cache = get_screen_cache()
+    key = ("screen", stats.version, days, screen.text)
+    result = cache.get(key)
+    inc("lst_screen_cache_requests_total", result="hit" if result is not None else "miss")
+    if result is None:
+        table_key = ("table", stats.version, days)
+        table = cache.get(table_key)
+        if table is None:
+            table = stats.for_window(days)
+            cache.put(table_key, table)
+        with span("screen", rows=len(table)):
+            result = run_screen(table, screen)
+        cache.put(key, result)
+    return result
@@ -0,0 +1,83 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Iterable, List, Optional
+
+import pandas as pd
+
+from utilities.compact import CompactHistory
+from utilities.metrics import LOOKBACK_WINDOWS, WindowStats, compute_window_stats, join_metadata
+from utilities.telemetry import span
+
+# ----------------------------------------------------------------------
+# Sharded scan for the big universes (Russell 2000, total US market).
+# The symbols are cut into shards; every shard is downloaded (through the
+# shared price store) and reduced to its per-window stats in a worker
+# process, so a worker never holds more than one shard of history. The
+# parent only receives the small per-window stats and stacks them, which
+# gives exactly the single-process result: the top-20 of the merged table
+# is the top-20 of the per-shard top-20s.
+# ----------------------------------------------------------------------
+SHARD_SIZE = 500
+SHARD_THRESHOLD = 1000  # universes above this size are scanned with `sharded_window_stats`
+
+
+def _scan_shard(symbols: List[str], windows: List[int], period: str, indicators: tuple) -> WindowStats:
+    """Download one shard and compute its per-window stats (runs in a worker process)."""
+    from utilities.ticker_info import download_ticker_data  # keeps the import light for the parent
+
+    frames = download_ticker_data(symbols=symbols, period=period)
+    return compute_window_stats(CompactHistory.from_frames(frames), symbols, windows, indicators=indicators)
+
+
+def sharded_window_stats(symbols: List[str], windows: Iterable[int] = LOOKBACK_WINDOWS,
+                         metadata: Optional[pd.DataFrame] = None, shard_size: int = SHARD_SIZE,
+                         max_processes: Optional[int] = None, period: str = "1y",
+                         progress_cb: Optional[Callable[[int, int], None]] = None,
+                         partial_cb: Optional[Callable[[WindowStats], None]] = None,
+                         indicators: Iterable[str] = ("RSI",)) -> WindowStats:
+    """
+    `compute_window_stats` for a large universe, sharded across a process pool.
+
+    Args:
+        symbols (List[str]): the universe.
+        windows (Iterable[int]): look-back windows to precompute.
+        metadata (pd.DataFrame): optional Symbol-indexed Sector/Name table (joined in the parent).
+        shard_size (int): symbols per worker task; bounds the memory of a worker.
+        max_processes (int): pool size (default: CPU count, at most 4, since
+            each worker also runs its own download threads).
+        period (str): history period to download.
+        progress_cb (callable): called as progress_cb(done, total) after each shard.
+        partial_cb (callable): called as partial_cb(stats) with every finished
+            shard's stats (metadata joined), e.g. for running top-k results.
+        indicators (Iterable[str]): indicators to compute (see `compute_window_stats`).
+
+    Returns:
+        WindowStats: same as `compute_window_stats` over all *symbols*.
+    """
+    windows = list(windows)
+    indicators = tuple(indicators)
+    shards = [symbols[i : i + shard_size] for i in range(0, len(symbols), shard_size)]
+    processes = max_processes or min(4, os.cpu_count() or 1)
+
+    parts = {}
+    with span("sharded_scan", symbols=len(symbols), shards=len(shards), processes=processes):
+        # spawn: forking a process that runs server / download threads is unsafe
+        # (workers import `utilities.telemetry`, which quiets Streamlit outside `streamlit run`)
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {pool.submit(_scan_shard, shard, windows, period, indicators): n for n, shard in enumerate(shards)}
+            for done, fut in enumerate(as_completed(futures), start=1):
+                parts[futures[fut]] = fut.result()
+                if partial_cb is not None:
+                    part = parts[futures[fut]]
+                    partial_cb(part if metadata is None else
+                               WindowStats(join_metadata(part.base, metadata), part.ago, part.n_valid, part.windows))
+                if progress_cb is not None:
+                    progress_cb(done, len(shards))
+
+    if not parts:
+        return compute_window_stats(CompactHistory.empty(), [], windows, indicators=indicators)
+    stats = WindowStats.concat(parts[n] for n in sorted(parts))
+    if metadata is not None:
+        stats.base = join_metadata(stats.base, metadata)
+    return stats
@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import pandas as pd
+import streamlit as st
+
+from utilities.compact import CompactHistory
+from utilities.price_store import latest_session_date, session_close
+from utilities.telemetry import inc
+from utilities.ticker_info import download_ticker_data
+
+# ----------------------------------------------------------------------
+# Per-symbol price history shared by every user and session of this
+# server process. Portfolios overlap heavily (AAPL, MSFT, NVDA, ...), so a
+# portfolio view only downloads the symbols nobody requested recently.
+# An entry stays fresh while its last bar is the latest final session and
+# was fetched after that session's close (before it, Yahoo's daily bar for
+# the day is an intraday snapshot); stale entries are re-requested at most
+# every `retry_after` seconds.
+# Entries are kept as `CompactHistory` (float32 closes, int volumes).
+# ----------------------------------------------------------------------
+
+
+class SymbolCache:
+    """
+    Thread-safe LRU of per-symbol compact histories.
+
+    Args:
+        max_symbols (int): symbols kept before the least recently used is dropped.
+        retry_after (float): seconds before a symbol whose last bar is behind
+            the latest session, or not final yet, is requested again (Yahoo
+            may not have published the bar yet, or it was an exchange holiday).
+    """
+
+    def __init__(self, max_symbols: int = 5000, retry_after: float = 900):
+        self.max_symbols = max_symbols
+        self.retry_after = retry_after
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # sym → (history, fetched_at)
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, entry: tuple, session_date: pd.Timestamp) -> bool:
+        history, fetched_at = entry
+        if (history.dates[-1].normalize() >= session_date
+                and fetched_at >= session_close(session_date).timestamp()):
+            return True
+        return time.time() - fetched_at < self.retry_after
+
+    def stale(self, symbols: List[str]) -> List[str]:
+        """Symbols that are missing or whose last bar is out of date."""
+        session_date = latest_session_date()
+        with self._lock:
+            return [s for s in symbols if s not in self._data or not self._is_fresh(self._data[s], session_date)]
+
+    def put(self, data: pd.DataFrame, symbols: List[str]):
+        now = time.time()
+        compact = CompactHistory.from_frame(data, symbols)
+        with self._lock:
+            for sym in compact.symbols:
+                history = compact.select([sym]).dropna()
+                if not len(history.dates):
+                    continue
+                self._data[sym] = (history, now)
+                self._data.move_to_end(sym)
+            while len(self._data) > self.max_symbols:
+                self._data.popitem(last=False)
+
+    def get(self, symbols: List[str]) -> CompactHistory:
+        """History of the cached *symbols* on one date index (missing ones left out)."""
+        parts: Dict[str, CompactHistory] = {}
+        with self._lock:
+            for sym in symbols:
+                entry = self._data.get(sym)
+                if entry is not None:
+                    self._data.move_to_end(sym)
+                    parts[sym] = entry[0]
+        return CompactHistory.concat(parts.values(), symbols)
+
+
+@st.cache_resource
+def get_symbol_cache() -> SymbolCache:
+    """The single `SymbolCache` shared by all sessions of this server process."""
+    return SymbolCache()
+
+
+def get_histories(symbols: List[str], cache: Optional[SymbolCache] = None) -> CompactHistory:
+    """
+    History for *symbols*, downloading only those not cached (or stale) in
+    the shared per-symbol cache.
+    """
+    cache = cache or get_symbol_cache()
+    stale = cache.stale(symbols)
+    inc("lst_symbol_cache_lookups_total", len(symbols) - len(stale), result="hit")
+    inc("lst_symbol_cache_lookups_total", len(stale), result="miss")
+    if stale:
+        frames = download_ticker_data(symbols=stale)
+        if frames:
+            cache.put(pd.concat(frames, axis=1), stale)
+    return cache.get(symbols)
@@ -0,0 +1,133 @@
+import bisect
+import difflib
+import re
+from typing import Dict, List, Optional, Tuple
+
+import streamlit as st
+
+from american import UNIVERSES, load_metadata
+
+# ----------------------------------------------------------------------
+# Ticker lookup for the watchlist search. A universe's symbols sit in a
+# hash set (membership is O(1) however many tickers are pasted) and its
+# symbols and company-name words in sorted lists, so a prefix search is a
+# `bisect` range instead of a scan. When prefixes find too little, a
+# fuzzy pass over the same words catches typos ("nvidai" → NVIDIA).
+# ----------------------------------------------------------------------
+_WORD = re.compile(r"[a-z0-9]+")
+# legal-form words every other company has; they would match everything
+_STOP_WORDS = {"inc", "corp", "corporation", "co", "company", "ltd", "plc", "the", "group", "holdings", "class"}
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(str(text).lower())
+
+
+def _normalize(ticker: str) -> str:
+    # same spelling as the constituent lists (BRK.B → BRK-B)
+    return re.sub(r"\.(\w)$", r"-\1", ticker.strip().upper())
+
+
+class SymbolIndex:
+    """
+    Exact, prefix and fuzzy lookup over tickers and company names.
+
+    Args:
+        symbols (List[str]): the universe's tickers.
+        names (Dict[str, str]): ticker → company name (missing names are fine).
+    """
+
+    def __init__(self, symbols: List[str], names: Optional[Dict[str, str]] = None):
+        self.symbols = list(dict.fromkeys(symbols))
+        self._set = frozenset(self.symbols)
+        names = names or {}
+        self.names = {s: str(names.get(s) or "") for s in self.symbols}
+        self._sorted_symbols = sorted(self.symbols)
+        # (word, symbol) pairs sorted by word: a prefix is one contiguous range
+        self._name_words = sorted(
+            (w, s) for s, name in self.names.items() for w in set(_words(name)) if w not in _STOP_WORDS
+        )
+        self._keys = [w for w, _ in self._name_words]
+        self._vocabulary = sorted(set(self._keys))
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._set
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def _symbol_prefix(self, prefix: str) -> List[str]:
+        i = bisect.bisect_left(self._sorted_symbols, prefix)
+        j = bisect.bisect_left(self._sorted_symbols, prefix + "\uffff")
+        return self._sorted_symbols[i:j]
+
+    def _word_prefix(self, prefix: str) -> set:
+        i = bisect.bisect_left(self._keys, prefix)
+        j = bisect.bisect_left(self._keys, prefix + "\uffff")
+        return {s for _, s in self._name_words[i:j]}
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, str]]:
+        """
+        (symbol, name) pairs matching *query*, best first: the exact ticker,
+        tickers starting with it, companies with a word starting with every
+        query word ("bank of am" → Bank of America), then fuzzy matches of
+        the query words against name words and tickers.
+        """
+        words = _words(query)
+        if not words:
+            return []
+        ticker = _normalize(query)
+        found: Dict[str, None] = {}  # insertion-ordered set
+
+        if ticker in self._set:
+            found[ticker] = None
+        for sym in self._symbol_prefix(ticker):
+            found.setdefault(sym)
+
+        by_words = None
+        for w in words:
+            hits = self._word_prefix(w) if w not in _STOP_WORDS else None
+            if hits is not None:
+                by_words = hits if by_words is None else by_words & hits
+        if by_words:
+            for sym in sorted(by_words, key=lambda s: (len(self.names[s]), s)):
+                found.setdefault(sym)
+
+        if len(found) < limit:
+            # typos: closest name words, then closest tickers
+            for w in words:
+                if len(w) < 3 or w in _STOP_WORDS:
+                    continue
+                for close in difflib.get_close_matches(w, self._vocabulary, n=limit, cutoff=0.75):
+                    for sym in sorted(self._exact_word(close)):
+                        found.setdefault(sym)
+            for sym in difflib.get_close_matches(ticker, self._sorted_symbols, n=limit, cutoff=0.75):
+                found.setdefault(sym)
+
+        return [(s, self.names[s]) for s in list(found)[:limit]]
+
+    def _exact_word(self, word: str) -> set:
+        i = bisect.bisect_left(self._keys, word)
+        j = bisect.bisect_right(self._keys, word)
+        return {s for _, s in self._name_words[i:j]}
+
+    def split(self, text: str) -> Tuple[List[str], List[str]]:
+        """
+        Parse a comma/space separated ticker list: (known tickers, unknown
+        entries), each de-duplicated and in input order.
+        """
+        known, unknown = {}, {}
+        for raw in re.split(r"[,\s]+", text):
+            sym = _normalize(raw)
+            if sym:
+                (known if sym in self._set else unknown).setdefault(sym)
+        return list(known), list(unknown)
+
+
+@st.cache_resource(max_entries=8)
+def get_symbol_index(universe: str) -> SymbolIndex:
+    """The `SymbolIndex` of a universe label (constituents + company names), built once per process."""
+    symbols = UNIVERSES[universe]()
+    meta = load_metadata(universe)
+    names = meta["Name"].dropna().to_dict() if "Name" in meta else {}
+    return SymbolIndex(symbols, names)
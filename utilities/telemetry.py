@@ -0,0 +1,291 @@
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+from streamlit import runtime
+
+logger = logging.getLogger("lst.perf")
+
+# ----------------------------------------------------------------------
+# Timing spans, counters and histograms for the whole pipeline
+# (constituents → chunk downloads → concat → stats → db → render).
+# Every span is logged as one JSON line on the "lst.perf" logger and feeds
+# a Prometheus-style histogram; the registry is process-wide, so the
+# warm-up thread, the page sessions and the CLI all report into it.
+# Set LST_METRICS_PORT to expose it at http://<host>:<port>/metrics, and
+# LST_PERF_LOG to "1" (stderr) or a file path to get the JSON lines.
+# With LST_PERF_PANEL=1 every page shows the spans of its own current run
+# (tagged with a run id, see `track_run`) in the sidebar.
+# ----------------------------------------------------------------------
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+PERF_PANEL = os.environ.get("LST_PERF_PANEL", "").lower() in ("1", "true", "yes")
+
+# the page run spans belong to; worker threads get it through `contextvars.copy_context`
+_run_id: ContextVar[Optional[str]] = ContextVar("lst_run_id", default=None)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _configure_perf_log():
+    """Attach a handler to "lst.perf" if LST_PERF_LOG is set (without one the INFO lines go nowhere)."""
+    target = os.environ.get("LST_PERF_LOG")
+    if not target or logger.handlers:
+        return
+    handler = logging.StreamHandler() if target.lower() in ("1", "stderr") else logging.FileHandler(target)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False  # one line per span even when the root logger prints INFO
+
+
+_configure_perf_log()
+
+
+def quiet_streamlit():
+    """
+    Silence Streamlit's "missing ScriptRunContext" / "No runtime found"
+    warnings when running outside `streamlit run` (CLI, benchmarks, worker
+    processes, notebooks). Streamlit gives each of its loggers its own
+    level and resets them all when it parses its config (lazily, on first
+    use), so setting the "streamlit" logger's level is not enough.
+    """
+    from streamlit import config, logger as st_logger
+
+    config.get_config_options()  # parse now, so the reset does not come after us
+    st_logger.set_log_level(logging.ERROR)  # existing and future Streamlit loggers
+
+
+# every `st.cache_*` decorator warns at import time when there is no
+# runtime, and the modules using them import this one first: quiet
+# Streamlit here, before the first decorator runs
+if not runtime.exists():
+    quiet_streamlit()
+
+
+def _key(labels: dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Registry:
+    """
+    Thread-safe counters and fixed-bucket histograms.
+
+    Args:
+        buckets (tuple): histogram upper bounds in seconds (+Inf is implied).
+        recent (int): how many finished spans `recent_spans` keeps.
+        runs (int): how many tagged runs `run_spans` keeps the spans of.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, recent: int = 200, runs: int = 256):
+        self.buckets = tuple(buckets)
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._hists: Dict[Tuple[str, LabelKey], list] = {}  # → [bucket counts..., +Inf], sum
+        self._recent: deque = deque(maxlen=recent)
+        self._runs: "OrderedDict[str, list]" = OrderedDict()  # run id → its spans
+        self._max_runs = runs
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _key(labels))
+        with self._lock:
+            hist = self._hists.get(key)
+            if hist is None:
+                hist = self._hists[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            hist[0][bisect.bisect_left(self.buckets, value)] += 1
+            hist[1] += value
+
+    def record_span(self, entry: dict, run: Optional[str] = None):
+        with self._lock:
+            self._recent.append(entry)
+            if run is not None:
+                self._runs.setdefault(run, []).append(entry)
+                self._runs.move_to_end(run)
+                while len(self._runs) > self._max_runs:
+                    self._runs.popitem(last=False)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._hists.clear()
+            self._recent.clear()
+            self._runs.clear()
+
+    # ── readouts ──────────────────────────────────────────────────────────
+    def _quantile(self, counts: list, q: float) -> float:
+        """Bucket upper bound below which a fraction *q* of the observations fall."""
+        total = sum(counts)
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            seen += n
+            if seen >= q * total:
+                return bound
+        return float("inf")
+
+    def counters(self) -> pd.DataFrame:
+        with self._lock:
+            rows = [{"Metric": name, "Labels": dict(labels), "Value": value}
+                    for (name, labels), value in sorted(self._counters.items())]
+        return pd.DataFrame(rows, columns=["Metric", "Labels", "Value"])
+
+    def span_summary(self) -> pd.DataFrame:
+        """Per span: count, total/mean seconds and bucketed p50/p95."""
+        with self._lock:
+            hists = {k: (list(v[0]), v[1]) for k, v in self._hists.items() if k[0] == "lst_span_seconds"}
+        rows = []
+        for (_, labels), (counts, total) in hists.items():
+            n = sum(counts)
+            rows.append({
+                "Span": dict(labels).get("span"), "Status": dict(labels).get("status"),
+                "Count": n, "Total s": total, "Mean s": total / n if n else float("nan"),
+                "p50 ≤ s": self._quantile(counts, 0.5), "p95 ≤ s": self._quantile(counts, 0.95),
+            })
+        columns = ["Span", "Status", "Count", "Total s", "Mean s", "p50 ≤ s", "p95 ≤ s"]
+        return pd.DataFrame(rows, columns=columns).sort_values("Total s", ascending=False, ignore_index=True)
+
+    def recent_spans(self) -> pd.DataFrame:
+        with self._lock:
+            return pd.DataFrame(list(self._recent)[::-1])
+
+    def run_spans(self, run: str) -> pd.DataFrame:
+        """The spans of one run, in the order they finished."""
+        with self._lock:
+            return pd.DataFrame(list(self._runs.get(run, ())))
+
+    def prometheus(self) -> str:
+        """The registry in the Prometheus text exposition format."""
+        def fmt(labels: LabelKey, extra: Optional[tuple] = None) -> str:
+            items = list(labels) + ([extra] if extra else [])
+            if not items:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+            hists = sorted((k, (list(v[0]), v[1])) for k, v in self._hists.items())
+        lines, typed = [], set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{fmt(labels)} {value:g}")
+        for (name, labels), (counts, total) in hists:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{name}_bucket{fmt(labels, ('le', le))} {cumulative}")
+            lines.append(f"{name}_sum{fmt(labels)} {total:.6f}")
+            lines.append(f"{name}_count{fmt(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def inc(name: str, value: float = 1, **labels):
+    """Increment counter *name* in the process-wide registry."""
+    REGISTRY.inc(name, value, **labels)
+
+
+@contextmanager
+def span(name: str, **fields):
+    """
+    Time a block (or, as a decorator, a function). The duration goes into
+    the `lst_span_seconds{span=..., status=ok|error}` histogram; *fields*
+    (symbol counts, universe, ...) only go into the JSON log line, so they
+    don't multiply the metric series.
+    """
+    t0 = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        seconds = time.perf_counter() - t0
+        REGISTRY.observe("lst_span_seconds", seconds, span=name, status=status)
+        entry = {"span": name, "seconds": round(seconds, 6), "status": status,
+                 "thread": threading.current_thread().name, **fields}
+        REGISTRY.record_span({"at": pd.Timestamp.now().strftime("%H:%M:%S"), **entry}, run=_run_id.get())
+        logger.info(json.dumps(entry, default=str))
+
+
+# ── exposition ──────────────────────────────────────────────────────────────
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # scrapes every few seconds, keep the log clean
+        pass
+
+
+@st.cache_resource
+def start_metrics_server() -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics on LST_METRICS_PORT (once per server process), if set."""
+    port = os.environ.get("LST_METRICS_PORT")
+    if not port:
+        return None
+    server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="lst-metrics", daemon=True).start()
+    return server
+
+
+def track_run():
+    """
+    Call at the top of a page: starts the metrics server (if configured)
+    and, with LST_PERF_PANEL on, tags the spans of this page run with a new
+    run id so `perf_panel` can show them apart from other sessions'.
+    """
+    start_metrics_server()
+    if PERF_PANEL:
+        _run_id.set(uuid.uuid4().hex)
+
+
+def perf_panel():
+    """
+    Call at the end of a page: with LST_PERF_PANEL on, a sidebar panel with
+    the timing breakdown of this session's current run (see `track_run`).
+    """
+    run = _run_id.get()
+    if not PERF_PANEL or run is None:
+        return
+    with st.sidebar.expander("⏱️ Performance (this run)"):
+        spans = REGISTRY.run_spans(run)
+        if spans.empty:
+            st.caption("Nothing timed in this run.")
+            return
+        summary = (spans.groupby(["span", "status"], as_index=False)
+                   .agg(Count=("seconds", "size"), Total=("seconds", "sum"), Max=("seconds", "max"))
+                   .rename(columns={"span": "Span", "status": "Status", "Total": "Total s", "Max": "Max s"})
+                   .sort_values("Total s", ascending=False, ignore_index=True))
+        st.dataframe(summary, hide_index=True, use_container_width=True)
+        st.caption("Spans, in the order they finished")
+        st.dataframe(spans.drop(columns="thread"), hide_index=True, use_container_width=True)
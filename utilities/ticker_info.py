@@ -1,10 +1,11 @@
 import numpy as np
 import pandas as pd
-import streamlit as st
-import requests
-from typing import Dict, List
-import time
-import yfinance as yf
+from typing import Callable, List, Optional
+from utilities.price_store import PriceStore, period_start
+from utilities.metrics import compute_ticker_stats
+from utilities.download_scheduler import returned_symbols, scheduled_download
+from utilities.providers import MarketDataProvider, get_provider
+from utilities.telemetry import span
 
 # @st.cache_data(ttl=86400)
 # def _get_logo_url_from_symbol(symbol:str, size=100):
@@ -51,48 +52,98 @@ def _price_days_ago(prices: pd.Series, days_back: int) -> float:
     target_date  = latest_date - pd.Timedelta(days=days_back)
     return prices.asof(target_date)                      # pandas handles the fallback
 
-def download_ticker_data(symbols: List[str], chunk_size: int = 150, period: str = "1y", interval: str = "1d") -> Dict[str, pd.DataFrame]:
+@span("download_ticker_data")
+def download_ticker_data(symbols: List[str], chunk_size: int = 50, period: str = "1y", interval: str = "1d",
+                         use_store: bool = True, max_workers: int = 8, retries: int = 2,
+                         provider: MarketDataProvider = None,
+                         progress_cb: Optional[Callable] = None,
+                         chunk_cb: Optional[Callable[[pd.DataFrame], None]] = None) -> List[pd.DataFrame]:
     """
-    Download historical stock data for a list of symbols using yfinance.
+    Download historical stock data for a list of symbols from the market-data
+    provider (yfinance unless configured otherwise, see `utilities.providers`).
+
+    Daily bars go through the on-disk `PriceStore`: symbols we already hold
+    only have their missing tail requested, and the result is read back
+    from the store. A symbol whose tail shows re-adjusted history (e.g. a
+    split) is downloaded again in full. Other intervals are downloaded in
+    full every time.
+    Chunks are downloaded concurrently (see `utilities.download_scheduler`),
+    with retries and a second pass for symbols that came back empty.
 
     Args:
         symbols (List[str]): List of stock symbols to download data for.
         chunk_size (int): Number of symbols to download in each chunk.
         period (str): Period for which to download data, e.g. "1y" for 1 year.
         interval (str): Data interval, e.g. "1d" for daily data.
+        use_store (bool): Read/write the local price store (daily bars only).
+        max_workers (int): Number of chunks downloaded at the same time.
+        retries (int): Extra attempts for a chunk that raised.
+        provider (MarketDataProvider): Backend to fetch from; defaults to `get_provider()`.
+        progress_cb (callable): called as progress_cb(done, total, report) after every
+            chunk (`report` is a `ChunkReport`); pages pass `adjust_ui.download_progress()`.
+            Nothing is drawn here, so this also runs outside Streamlit.
+        chunk_cb (callable): called as chunk_cb(frame) with the complete history
+            (whole *period*) of symbols as soon as they are ready: symbols the
+            store already holds first, then every downloaded chunk. Each symbol
+            is passed exactly once, so per-chunk stats add up to the full scan.
     Returns:
-        Dict[str, pd.DataFrame]: Dictionary where keys are symbols and values are DataFrames with 'Close' and 'Volume' Series.
+        List[pd.DataFrame]: ticker-grouped frames (columns are (symbol, field)), meant to be `pd.concat(axis=1)`-ed.
     """
-    
-    chunks = [symbols[i : i + chunk_size] for i in range(0, len(symbols), chunk_size)]
-    bar_ph = st.progress(0, "⏳ downloading price history…")  # bar placeholder
-    text_ph = st.empty()  # timer placeholder
-    start_ts = time.time()
-
-    frames = []
-    for n, chunk in enumerate(chunks, start=1):
-        frames.append(
-            yf.download(
-                chunk,
-                period=period,
-                interval=interval,
-                group_by="ticker",
-                threads=True,
-                progress=False,
-                auto_adjust=False,
-                timeout = 3
-            )
+    provider = provider or get_provider()
+    emitted = set()
+
+    def _emit(frame):
+        fresh = [s for s in returned_symbols(frame) if s not in emitted]
+        if chunk_cb is not None and fresh:
+            emitted.update(fresh)
+            chunk_cb(frame.loc[:, frame.columns.get_level_values(0).isin(fresh)])
+
+    def _download(group, start=None, on_chunk=None):
+        frames, _, _ = scheduled_download(
+            provider.fetch, group, chunk_size=chunk_size, max_workers=max_workers, retries=retries,
+            progress_cb=progress_cb, chunk_cb=on_chunk, period=period, start=start, interval=interval,
         )
-        elapsed = time.time() - start_ts
-        bar_ph.progress(n / len(chunks))
-        text_ph.text(f"⏳ downloading price history… {elapsed:0.1f}s")
-
-    # clear widgets
-    bar_ph.empty()
-    text_ph.empty()
+        return frames
+
+    if not use_store or interval != "1d":
+        frames = _download(symbols, on_chunk=lambda frame, report: _emit(frame))
+    else:
+        store = PriceStore(interval=interval)
+        plan = store.plan(symbols, period=period)
+        start_at = period_start(period)
+        if chunk_cb is not None:
+            # up to date in the store: ready before any download, read chunk by chunk too
+            planned = {s for group in plan.values() for s in group}
+            ready = [s for s in symbols if s not in planned]
+            for i in range(0, len(ready), chunk_size):
+                _emit(store.read(ready[i : i + chunk_size], start=start_at))
+
+        restated = []
+
+        def _store_chunk(frame, report):
+            # written as each chunk arrives, so its symbols are complete right away
+            chunk = list(frame.columns.get_level_values(0).unique())
+            written = store.write(frame, chunk)
+            # a tail that disagrees with the stored bars dropped the stored history
+            restated.extend(s for s in chunk if store.coverage(s) is None)
+            if chunk_cb is not None and written:
+                # the merged histories `store.read(...)` would return, without reading them back
+                _emit(pd.concat({s: df.loc[start_at:] for s, df in written.items()},
+                                axis=1, names=["Ticker", "Price"], sort=True))
+
+        for start, group in plan.items():
+            # start=None → cold symbols, pull the whole period
+            _download(group, start=start, on_chunk=_store_chunk)
+        if restated:
+            _download(list(dict.fromkeys(restated)), on_chunk=_store_chunk)
+        frames = [store.read(symbols, start=start_at)]
+        if chunk_cb is not None:
+            # tail requests that brought nothing new still have stored history
+            _emit(frames[0])
     return frames
 
-def get_ticker_stats(data,symbols,days_back=30):  
+@span("get_ticker_stats")
+def get_ticker_stats(data,symbols,days_back=30,vectorized=False,metadata=None):  
     
     """
     Args:
@@ -100,6 +151,11 @@ def get_ticker_stats(data,symbols,days_back=30):
             The keys are symbols and the values are dictionaries with 'Close' and 'Volume' Series.
         symbols (list of str): a list of stock symbols to calculate metrics for.
         days (int): number of days to look back for price change and RSI calculation.
+        vectorized (bool): compute all symbols at once on the wide dates × symbols
+            matrix (see `utilities.metrics.compute_ticker_stats`) instead of looping.
+        metadata (pd.DataFrame): Symbol-indexed Sector/Name table from
+            `american.load_metadata`; fills `Sector` (the vectorized mode also
+            adds `Name` and `SubIndustry`).
 
     Returns:
         ticker_metrics (list of dict): a list of dictionaries containing ticker metrics.
@@ -109,7 +165,7 @@ def get_ticker_stats(data,symbols,days_back=30):
     following keys:
 
     - `Symbol`: the symbol
-    - `Sector`: the sector (not used yet)
+    - `Sector`: the GICS sector ("-" if unknown or no *metadata* given)
     - `Change`: the price change over `days` in percent
     - `Today`: the price today
     - `Ago`: the price `days` ago
@@ -119,6 +175,9 @@ def get_ticker_stats(data,symbols,days_back=30):
     Returns:
         ticker_metrics (list containg dicts): a list of dictionaries with ticker metrics
     """
+    if vectorized:
+        return compute_ticker_stats(data, symbols, days_back, metadata).to_dict("records")
+
     ticker_metrics = []
     for sym in symbols:
 
@@ -140,7 +199,9 @@ def get_ticker_stats(data,symbols,days_back=30):
         pct      = (price_now / price_then - 1) * 100
         rsi_val  = _rsi(series=closes).iloc[-1]
         avg_vol  = vols.tail(30).mean() # fix avg volume to last 30 days
-        sector   = "-" #TODO: find a way to fetch sector info
+        sector   = "-"
+        if metadata is not None and sym in metadata.index and pd.notna(metadata.at[sym, "Sector"]):
+            sector = metadata.at[sym, "Sector"]
         ticker_metrics.append({
             "Symbol": sym, "Sector": sector,
             "Change": pct, "Today": price_now, "Ago": price_then,
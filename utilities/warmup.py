@@ -0,0 +1,111 @@
+# warmup.py - keep constituents, price history and scan stats warm
+#
+#   python -m utilities.warmup            # standalone worker, runs on schedule
+#   python -m utilities.warmup --once     # refresh everything now and exit
+#
+# Inside the app, `start_warmup_scheduler()` runs the same loop on a daemon
+# thread (once per server process). Results are published through
+# `utilities.scan_cache`, in memory and on disk, so Scanner and the
+# portfolio pages read them instead of downloading.
+import argparse
+import logging
+import os
+import threading
+from datetime import datetime, time as dtime, timedelta
+from typing import List, Optional
+
+import streamlit as st
+
+from american import CORE_UNIVERSES, load_all_universes
+from utilities.price_store import MARKET_TZ
+from utilities.scan_cache import get_cached_stats
+from utilities.scan_engine import run_scan
+
+logger = logging.getLogger(__name__)
+
+# ET wall-clock times: after the US close (final daily bars) and before the open
+DEFAULT_TIMES = "16:30,09:00"
+
+
+def _parse_times(spec: str) -> List[dtime]:
+    return sorted(dtime.fromisoformat(t.strip()) for t in spec.split(",") if t.strip())
+
+
+def next_run(now: datetime, times: List[dtime]) -> datetime:
+    """First scheduled time strictly after *now* (ET), skipping weekends."""
+    now = now.astimezone(MARKET_TZ)
+    day = now.date()
+    while True:
+        if day.weekday() < 5:
+            for t in times:
+                candidate = datetime.combine(day, t, tzinfo=MARKET_TZ)
+                if candidate > now:
+                    return candidate
+        day += timedelta(days=1)
+
+
+def warm_universe(label: str):
+    """Refresh constituents, price history and all-window stats for one universe."""
+    t0 = datetime.now()
+    result = run_scan(label, use_cache=False)  # publishes the full-universe stats
+    logger.info("warmed %s: %d symbols in %.1fs", label, len(result.stats.base), (datetime.now() - t0).total_seconds())
+
+
+def warm_all(only_missing: bool = False):
+    """Warm every universe; with *only_missing* skip those already published today."""
+    try:
+        load_all_universes()  # constituents of all three pages fetched in parallel
+    except Exception:
+        logger.exception("constituent refresh failed")
+    for label in CORE_UNIVERSES:
+        if only_missing and get_cached_stats(label) is not None:
+            continue
+        try:
+            warm_universe(label)
+        except Exception:
+            logger.exception("warm-up of %s failed", label)
+
+
+def run_schedule(stop: threading.Event, times: Optional[List[dtime]] = None):
+    """Warm anything missing now, then again at every scheduled time until *stop* is set."""
+    times = times or _parse_times(os.environ.get("LST_WARMUP_TIMES", DEFAULT_TIMES))
+    warm_all(only_missing=True)
+    while not stop.is_set():
+        when = next_run(datetime.now(MARKET_TZ), times)
+        logger.info("next warm-up at %s", when.isoformat())
+        if stop.wait((when - datetime.now(MARKET_TZ)).total_seconds()):
+            break
+        warm_all()
+
+
+@st.cache_resource
+def start_warmup_scheduler() -> Optional[threading.Event]:
+    """
+    Start the warm-up loop on a daemon thread, once per server process.
+    Disabled with LST_WARMUP=0 (e.g. when a separate worker runs it).
+    Returns the event that stops the loop.
+    """
+    if os.environ.get("LST_WARMUP", "1") == "0":
+        return None
+    stop = threading.Event()
+    threading.Thread(target=run_schedule, args=(stop,), name="lst-warmup", daemon=True).start()
+    return stop
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prefetch constituents, prices and scan stats.")
+    parser.add_argument("--once", action="store_true", help="refresh all universes now and exit")
+    parser.add_argument("--times", default=os.environ.get("LST_WARMUP_TIMES", DEFAULT_TIMES),
+                        help="comma-separated ET times, e.g. '16:30,09:00'")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    if args.once:
+        warm_all()
+    else:
+        run_schedule(threading.Event(), _parse_times(args.times))
+
+
+if __name__ == "__main__":
+    main()